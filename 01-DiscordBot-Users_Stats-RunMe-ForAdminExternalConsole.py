@@ -8,6 +8,8 @@ This script does everything from start to end and makes other bot files obsolete
 import discord
 import json
 import os
+import sys
+import time
 import asyncio
 from collections import defaultdict
 from datetime import datetime, timezone
@@ -22,17 +24,125 @@ intents.message_content = True
 intents.reactions = True
 intents.members = True
 
+# Per-channel scan progress kept between runs (see --rescan)
+CHECKPOINT_FILE = '02-DiscordBot-Users_Stats-ScanCheckpoints.json'
+CHECKPOINT_VERSION = 1
+
+# Seconds between progress redraws on a terminal / progress lines in logs (set from env in main())
+PROGRESS_REFRESH_SECONDS = 0.25
+PROGRESS_LOG_SECONDS = 15.0
+
+def new_analytics_data():
+    """Empty analytics counters (user_id -> channel_id -> count / emoji -> count)"""
+    return {
+        'messages': defaultdict(lambda: defaultdict(int)),
+        'reactions_given': defaultdict(lambda: defaultdict(lambda: defaultdict(int))),
+        'reactions_received': defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+    }
+
+def merge_analytics_data(target, source):
+    """Add the counters of one analytics data dict into another"""
+    for user_id, channels in source['messages'].items():
+        for channel_id, count in channels.items():
+            target['messages'][user_id][channel_id] += count
+    for category in ('reactions_given', 'reactions_received'):
+        for user_id, channels in source[category].items():
+            for channel_id, emojis in channels.items():
+                for emoji, count in emojis.items():
+                    target[category][user_id][channel_id][emoji] += count
+
+class ProgressRenderer:
+    """
+    Throttled scan progress output.
+    
+    On a terminal the progress line is redrawn in place at most every PROGRESS_REFRESH_SECONDS.
+    When stdout is not a TTY (systemd, piped logs) a plain key=value line is printed every
+    PROGRESS_LOG_SECONDS instead, so the log gets a readable history rather than carriage returns.
+    Throughput is averaged over the whole scan; the ETA is extrapolated from done/total.
+    
+    Args:
+        label: Name shown in non-TTY lines (e.g. '#general')
+        stream: Output stream (default: sys.stdout)
+    """
+    
+    def __init__(self, label='', stream=None):
+        self.label = label
+        self.stream = stream or sys.stdout
+        self.tty = self.stream.isatty()
+        self.interval = PROGRESS_REFRESH_SECONDS if self.tty else PROGRESS_LOG_SECONDS
+        self.started = time.monotonic()
+        self.last_render = self.started
+    
+    def update(self, messages, reactions, done=None, total=None, detail=''):
+        """
+        Record the current progress and render it if the interval has passed.
+        
+        Args:
+            messages: Messages scanned so far
+            reactions: Reactions counted so far
+            done: Units of work finished (default: messages)
+            total: Estimated units of work in total, used for percent and ETA
+            detail: Extra text appended to the line
+        """
+        now = time.monotonic()
+        if now - self.last_render < self.interval:
+            return
+        self.last_render = now
+        
+        done = messages if done is None else done
+        elapsed = max(now - self.started, 1e-9)
+        msg_rate = messages / elapsed
+        reaction_rate = reactions / elapsed
+        percent = min(int(done / total * 100), 100) if total else None
+        eta = elapsed * (total - done) / done if total and 0 < done < total else None
+        
+        if self.tty:
+            line = f"     📊 {percent if percent is not None else 0:3d}% | {messages:,} messages, {reactions:,} reactions"
+            line += f" | {msg_rate:,.0f} msgs/s, {reaction_rate:,.0f} reactions/s"
+            if eta is not None:
+                line += f" | ETA {format_duration(eta)}"
+            if detail:
+                line += f" | {detail}"
+            print(f"\r{line[:200]}".ljust(120), end='', file=self.stream, flush=True)
+        else:
+            fields = [f"progress {self.label}".rstrip()]
+            if percent is not None:
+                fields.append(f"percent={percent}")
+            fields.append(f"messages={messages} reactions={reactions}")
+            fields.append(f"msgs_per_s={msg_rate:.1f} reactions_per_s={reaction_rate:.1f}")
+            if eta is not None:
+                fields.append(f"eta_s={eta:.0f}")
+            if detail:
+                fields.append(detail)
+            print("     " + " ".join(fields), file=self.stream, flush=True)
+    
+    def finish(self, text=None):
+        """End the progress output, optionally replacing the line with a final status"""
+        if text is not None:
+            print(f"\r{text}".ljust(120) if self.tty else text, file=self.stream, flush=True)
+        elif self.tty:
+            print(file=self.stream)
+
+def format_duration(seconds):
+    """Format seconds as H:MM:SS (or M:SS under an hour)"""
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
 class DiscordAnalyticsReporter:
-    def __init__(self, token, start_date=None, end_date=None):
+    def __init__(self, token, start_date=None, end_date=None, reaction_concurrency=4, scan_mode='full', channel_workers=4,
+                 resume=True, checkpoint_interval=30.0):
         self.client = discord.Client(intents=intents)
         self.token = token
         self.start_date = start_date
         self.end_date = end_date
-        self.analytics_data = {
-            'messages': defaultdict(lambda: defaultdict(int)),
-            'reactions_given': defaultdict(lambda: defaultdict(lambda: defaultdict(int))),
-            'reactions_received': defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
-        }
+        self.reaction_concurrency = reaction_concurrency  # Reaction user lists fetched at once
+        self.scan_mode = scan_mode  # 'full' lists every reactor, 'count' uses reaction.count (received only)
+        self.channel_workers = channel_workers  # Channels scanned at the same time
+        self.resume = resume  # Continue from CHECKPOINT_FILE instead of rescanning everything
+        self.checkpoint_interval = checkpoint_interval  # Seconds between checkpoint saves during a scan
+        self.checkpoints = {}  # channel_id -> checkpoint (see new_checkpoint)
+        self.analytics_data = new_analytics_data()
         self.user_names = {}  # Cache for user display names
         
         # Set up event handlers
@@ -67,6 +177,7 @@ class DiscordAnalyticsReporter:
         total_messages_scanned = 0
         total_reactions_found = 0
         skipped_channels = []
+        server_guild_channels = []  # (server_guild, accessible channels, private channels) in visual order
         
         for server_guild in self.client.guilds:
             print(f"\n📋 Analyzing Server: {server_guild.name} (ID: {server_guild.id})")
@@ -97,22 +208,30 @@ class DiscordAnalyticsReporter:
                     private_channels.append(channel)
             
             print(f"   Text Channels: {len(accessible_channels)} accessible, {len(private_channels)} private/restricted")
-            
-            # Process accessible channels in visual order
+            server_guild_channels.append((server_guild, accessible_channels, private_channels))
+        
+        # Scan the accessible channels of every server with a pool of workers
+        self.load_checkpoints()
+        jobs = [channel for _, accessible_channels, _ in server_guild_channels for channel in accessible_channels]
+        results = await self.scan_channels(jobs)
+        
+        # Merge and report per channel in visual order, whatever order the workers finished in
+        for server_guild, accessible_channels, private_channels in server_guild_channels:
+            print(f"\n📋 {server_guild.name}")
             for channel in accessible_channels:
-                try:
-                    print(f"   🔍 Scanning #{channel.name}...")
-                    channel_messages, channel_reactions = await self.analyze_channel(channel)
-                    total_messages_scanned += channel_messages
-                    total_reactions_found += channel_reactions
-                    total_channels += 1
-                    
-                except discord.Forbidden:
-                    print(f"   ❌ No permission to read #{channel.name}")
-                    skipped_channels.append(f"{server_guild.name}#{channel.name}")
-                except Exception as e:
-                    print(f"   ❌ Error scanning #{channel.name}: {str(e)}")
+                result = results[channel.id]
+                if result['error'] is not None:
+                    print(f"   ❌ {result['error']}")
                     skipped_channels.append(f"{server_guild.name}#{channel.name}")
+                    continue
+                
+                merge_analytics_data(self.analytics_data, result['data'])
+                for user_id, name in result['user_names'].items():
+                    self.user_names.setdefault(user_id, name)
+                total_messages_scanned += result['messages']
+                total_reactions_found += result['reactions']
+                total_channels += 1
+                print(f"   ✅ #{channel.name}: {result['messages']:,} messages, {result['reactions']:,} reactions")
             
             # List private/restricted channels for this server
             if private_channels:
@@ -136,13 +255,241 @@ class DiscordAnalyticsReporter:
         # Save data to JSON file
         self.save_analytics_data()
     
-    async def analyze_channel(self, channel, limit=None):
-        """Analyze a single channel for messages and reactions"""
+    def checkpoint_key(self):
+        """Scan options a checkpoint was made with; checkpoints only resume under the same options"""
+        return {
+            'start_date': self.start_date.isoformat() if self.start_date else None,
+            'end_date': self.end_date.isoformat() if self.end_date else None,
+            'scan_mode': self.scan_mode
+        }
+    
+    @staticmethod
+    def new_checkpoint():
+        """
+        Scan progress of one channel.
+        
+        newest_id/oldest_id bound the messages already counted; complete is True once the
+        backfill reached the start of the channel (or the start date) after counting at least
+        one message. data and user_names hold the partial counters of that channel.
+        """
+        return {
+            'newest_id': None, 'oldest_id': None, 'complete': False,
+            'messages': 0, 'reactions': 0,
+            'data': new_analytics_data(), 'user_names': {}
+        }
+    
+    def load_checkpoints(self):
+        """Load per-channel checkpoints from earlier runs made with the same options"""
+        self.checkpoints = {}
+        if not self.resume or not os.path.exists(CHECKPOINT_FILE):
+            return
+        
+        try:
+            with open(CHECKPOINT_FILE, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not read {CHECKPOINT_FILE} ({e}); scanning from scratch")
+            return
+        
+        if saved.get('version') != CHECKPOINT_VERSION or saved.get('key') != self.checkpoint_key():
+            print(f"⚠️  {CHECKPOINT_FILE} was made with different options; scanning from scratch")
+            return
+        
+        for channel_id, checkpoint in saved.get('channels', {}).items():
+            data = new_analytics_data()
+            merge_analytics_data(data, checkpoint['data'])
+            checkpoint['data'] = data
+            self.checkpoints[channel_id] = checkpoint
+        
+        complete = sum(1 for checkpoint in self.checkpoints.values() if checkpoint['complete'])
+        print(f"♻️  Resuming from {CHECKPOINT_FILE}: {len(self.checkpoints)} channels "
+              f"({complete} fully scanned, only new messages are fetched for those)")
+    
+    def save_checkpoints(self):
+        """Write all channel checkpoints (temporary file plus atomic rename)"""
+        temp_file = CHECKPOINT_FILE + '.tmp'
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    'version': CHECKPOINT_VERSION,
+                    'key': self.checkpoint_key(),
+                    'saved_at': datetime.now().isoformat(),
+                    'channels': self.checkpoints
+                }, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp_file, CHECKPOINT_FILE)
+        except OSError as e:
+            print(f"\n⚠️  Could not save scan checkpoints: {e}")
+    
+    async def checkpoint_history(self, channel, checkpoint, history_kwargs):
+        """
+        Messages a checkpointed channel still needs: first those newer than the newest counted
+        message (oldest first), then the unfinished backfill below the oldest one (newest first).
+        A channel with nothing counted yet is read in full again.
+        """
+        if checkpoint['newest_id'] is not None:
+            kwargs = dict(history_kwargs, after=discord.Object(id=checkpoint['newest_id']), oldest_first=True)
+            async for message in channel.history(**kwargs):
+                yield message
+        
+        if not checkpoint['complete'] or checkpoint['newest_id'] is None:
+            kwargs = dict(history_kwargs, oldest_first=False)
+            if checkpoint['oldest_id'] is not None:
+                kwargs['before'] = discord.Object(id=checkpoint['oldest_id'])
+            async for message in channel.history(**kwargs):
+                yield message
+    
+    async def scan_channels(self, channels):
+        """
+        Scan channels with a pool of channel_workers workers.
+        
+        Every channel is scanned into its own analytics data so workers never share counters;
+        the caller merges the results in visual order, which keeps the output deterministic.
+        Channel checkpoints are saved every checkpoint_interval seconds and when the scan ends
+        or is interrupted, so the next run only fetches what is still missing.
+        
+        Returns:
+            dict: channel.id -> {'data', 'user_names', 'messages', 'reactions', 'error'}
+        """
+        queue = asyncio.Queue()
+        for channel in channels:
+            queue.put_nowait(channel)
+        
+        results = {}
+        workers = max(1, min(self.channel_workers, len(channels)))
+        solo = workers == 1  # A single worker prints its own live progress as before
+        status = {}  # Worker number -> progress of the channel it is scanning
+        finished = {'messages': 0, 'reactions': 0}  # Totals of channels no longer in status
+        
+        async def worker(number):
+            while not queue.empty():
+                channel = queue.get_nowait()
+                checkpoint = self.checkpoints.setdefault(str(channel.id), self.new_checkpoint())
+                result = results[channel.id] = {
+                    'data': checkpoint['data'], 'user_names': checkpoint['user_names'],
+                    'messages': 0, 'reactions': 0, 'error': None
+                }
+                progress = None if solo else status.setdefault(number, {})
+                if progress is not None:
+                    progress.update(channel=channel.name, messages=0, reactions=0)
+                else:
+                    print(f"   🔍 Scanning #{channel.guild.name}#{channel.name}...")
+                try:
+                    await self.analyze_channel(
+                        channel, analytics_data=result['data'], user_names=result['user_names'],
+                        progress=progress, checkpoint=checkpoint
+                    )
+                    result['messages'], result['reactions'] = checkpoint['messages'], checkpoint['reactions']
+                except discord.Forbidden:
+                    result['error'] = f"No permission to read #{channel.name}"
+                except Exception as e:
+                    result['error'] = f"Error scanning #{channel.name}: {str(e)}"
+                if progress is not None:
+                    finished['messages'] += progress.get('messages', 0)
+                    finished['reactions'] += progress.get('reactions', 0)
+                status.pop(number, None)
+        
+        renderer = None if solo else ProgressRenderer('all channels')
+        
+        async def show_progress():
+            while True:
+                await asyncio.sleep(renderer.interval)
+                active = sorted(status.items())
+                done = len(results) - len(status)
+                line = f"{done}/{len(channels)} channels done | " + " | ".join(
+                    f"W{number} #{progress.get('channel', '?')} {progress.get('messages', 0):,} msgs"
+                    for number, progress in active
+                )
+                renderer.update(
+                    finished['messages'] + sum(progress.get('messages', 0) for _, progress in active),
+                    finished['reactions'] + sum(progress.get('reactions', 0) for _, progress in active),
+                    done=done, total=len(channels), detail=line
+                )
+        
+        async def save_periodically():
+            while True:
+                await asyncio.sleep(self.checkpoint_interval)
+                self.save_checkpoints()
+        
+        print(f"\n🚀 Scanning {len(channels)} channels with {workers} worker(s)...")
+        progress_task = None if solo else asyncio.create_task(show_progress())
+        checkpoint_task = asyncio.create_task(save_periodically())
+        try:
+            await asyncio.gather(*(worker(number) for number in range(1, workers + 1)))
+        finally:
+            # Also runs on Ctrl+C / cancellation, so an interrupted scan keeps its progress
+            checkpoint_task.cancel()
+            self.save_checkpoints()
+            if progress_task is not None:
+                progress_task.cancel()
+                renderer.finish()
+        return results
+    
+    def message_in_range(self, message):
+        """Check if message is within the date range (additional check for precision)"""
+        if self.start_date and message.created_at < self.start_date:
+            return False
+        if self.end_date and message.created_at > self.end_date:
+            return False
+        return True
+    
+    async def fetch_reaction_users(self, messages):
+        """
+        Fetch the users behind every reaction on a page of in-range messages concurrently.
+        
+        At most reaction_concurrency reaction.users() iterators run at the same time; discord.py's
+        HTTP client still queues each request on its rate-limit bucket and retries 429s.
+        
+        Returns:
+            list: One list per message of (reaction, [users]) pairs, in message order
+        """
+        semaphore = asyncio.Semaphore(self.reaction_concurrency)
+        
+        async def fetch(reaction):
+            async with semaphore:
+                return [user async for user in reaction.users()]
+        
+        wanted = [message.reactions if self.message_in_range(message) else [] for message in messages]
+        users = iter(await asyncio.gather(*(fetch(reaction) for reactions in wanted for reaction in reactions)))
+        return [[(reaction, next(users)) for reaction in reactions] for reactions in wanted]
+    
+    async def history_with_reaction_users(self, history, page_size=100):
+        """Yield (message, [(reaction, [users]), ...]) a page of history at a time
+        
+        In count scan mode no lookups are made and every users list is None.
+        """
+        if self.scan_mode == 'count':
+            async for message in history:
+                yield message, [(reaction, None) for reaction in message.reactions]
+            return
+        
+        page = []
+        async for message in history:
+            page.append(message)
+            if len(page) >= page_size:
+                for item in zip(page, await self.fetch_reaction_users(page)):
+                    yield item
+                page = []
+        if page:
+            for item in zip(page, await self.fetch_reaction_users(page)):
+                yield item
+    
+    async def analyze_channel(self, channel, limit=None, analytics_data=None, user_names=None, progress=None, checkpoint=None):
+        """Analyze a single channel for messages and reactions
+        
+        Args:
+            analytics_data: Counters to add to (default: self.analytics_data)
+            user_names: Display name cache to fill (default: self.user_names)
+            progress: Optional dict updated with live progress instead of printing it
+            checkpoint: Optional channel checkpoint; only messages it does not cover are fetched,
+                and it is advanced after every counted message
+        """
+        analytics_data = self.analytics_data if analytics_data is None else analytics_data
+        user_names = self.user_names if user_names is None else user_names
         channel_id = str(channel.id)
         messages_count = 0
         reactions_count = 0
         messages_in_range = 0
-        last_update_time = 0
+        renderer = ProgressRenderer(f"#{channel.name}") if progress is None else None
         
         # Display date range info
         date_range_info = ""
@@ -155,7 +502,8 @@ class DiscordAnalyticsReporter:
                 date_range_info = f" (Until: {self.end_date.strftime('%Y-%m-%d')})"
         
         # Always scan ALL messages in the channel for complete historical data
-        print(f"     🔍 Scanning ALL historical messages{date_range_info} (this may take a while)...")
+        if progress is None:
+            print(f"     🔍 Scanning ALL historical messages{date_range_info} (this may take a while)...")
         
         if DEBUG_MODE:
             print(f"🔍 DEBUG: Starting full historical scan for #{channel.name}")
@@ -189,13 +537,8 @@ class DiscordAnalyticsReporter:
             estimated_total = 1000  # Fallback estimate
         
         try:
-            import time
-            start_time = time.time()
-            
-            # Set up date filtering parameters for channel.history()
-            history_kwargs = {}
-            if limit is not None:
-                history_kwargs['limit'] = limit
+            # Set up date filtering parameters for channel.history() (limit=None reads the whole history)
+            history_kwargs = {'limit': limit}
             if self.start_date:
                 history_kwargs['after'] = self.start_date
             if self.end_date:
@@ -204,35 +547,44 @@ class DiscordAnalyticsReporter:
             if DEBUG_MODE:
                 print(f"🔍 DEBUG: Starting message iteration with kwargs: {history_kwargs}")
             
-            async for message in channel.history(**history_kwargs):
+            if checkpoint is not None:
+                history = self.checkpoint_history(channel, checkpoint, history_kwargs)
+                base_messages, base_reactions = checkpoint['messages'], checkpoint['reactions']
+            else:
+                history = channel.history(**history_kwargs)
+            
+            # Reactor lists for each page of history are fetched concurrently
+            async for message, reactions in self.history_with_reaction_users(history):
                 messages_count += 1
                 
-                # Check if message is within date range (additional check for precision)
-                message_in_range = True
-                if self.start_date and message.created_at < self.start_date:
-                    message_in_range = False
-                if self.end_date and message.created_at > self.end_date:
-                    message_in_range = False
-                
-                if message_in_range:
+                if self.message_in_range(message):
                     messages_in_range += 1
                     
                     # Track message count (skip bot messages)
                     if not message.author.bot:
                         user_id = str(message.author.id)
-                        self.analytics_data['messages'][user_id][channel_id] += 1
+                        analytics_data['messages'][user_id][channel_id] += 1
                         
                         # Cache user name
-                        if user_id not in self.user_names:
-                            self.user_names[user_id] = message.author.display_name
+                        if user_id not in user_names:
+                            user_names[user_id] = message.author.display_name
                     
                     # Process reactions on this message
-                    for reaction in message.reactions:
+                    for reaction, users in reactions:
                         emoji = str(reaction.emoji)
                         message_author_id = str(message.author.id)
                         
-                        # Get all users who reacted with this emoji
-                        async for user in reaction.users():
+                        if users is None:
+                            # Count scan: credit the author from the payload, minus the bot's own reaction
+                            # (reactors are not listed, so self-reactions and other bots are included)
+                            received = reaction.count - (1 if reaction.me else 0)
+                            if received > 0:
+                                reactions_count += received
+                                analytics_data['reactions_received'][message_author_id][channel_id][emoji] += received
+                            continue
+                        
+                        # All users who reacted with this emoji
+                        for user in users:
                             if user.bot:
                                 continue  # Skip bot reactions
                             
@@ -240,41 +592,49 @@ class DiscordAnalyticsReporter:
                             reactions_count += 1
                             
                             # Cache user name
-                            if user_id not in self.user_names:
-                                self.user_names[user_id] = user.display_name
+                            if user_id not in user_names:
+                                user_names[user_id] = user.display_name
                             
                             # Track reactions given by user
-                            self.analytics_data['reactions_given'][user_id][channel_id][emoji] += 1
+                            analytics_data['reactions_given'][user_id][channel_id][emoji] += 1
                             
                             # Track reactions received by message author (don't count self-reactions)
                             if user_id != message_author_id:
-                                self.analytics_data['reactions_received'][message_author_id][channel_id][emoji] += 1
+                                analytics_data['reactions_received'][message_author_id][channel_id][emoji] += 1
                 
-                # Progress indicator every 10% increment or every 100 messages for large scans
                 progress_percent = min(int((messages_count / estimated_total) * 100), 100)
                 
-                # For large scans, show progress more frequently
-                if limit is None and messages_count % 100 == 0:
-                    print(f"\r     📊 {progress_percent:3d}% | {messages_count:,} messages ({messages_in_range:,} in range), {reactions_count:,} reactions", end='', flush=True)
-                # For smaller scans, show progress at 10% increments
-                elif limit is not None and progress_percent > 0 and progress_percent % 10 == 0 and progress_percent != last_update_time:
-                    print(f"\r     📊 {progress_percent:3d}% | {messages_count:,} messages ({messages_in_range:,} in range), {reactions_count:,} reactions", end='', flush=True)
-                    last_update_time = progress_percent
-                # Show progress between milestones to indicate activity
-                elif messages_count % 5 == 0:
-                    current_progress = min(int((messages_count / estimated_total) * 100), 100)
-                    print(f"\r     📊 {current_progress:3d}% | {messages_count:,} messages ({messages_in_range:,} in range), {reactions_count:,} reactions", end='', flush=True)
+                # This message is fully counted; move the checkpoint past it
+                if checkpoint is not None:
+                    checkpoint['newest_id'] = max(checkpoint['newest_id'] or message.id, message.id)
+                    checkpoint['oldest_id'] = min(checkpoint['oldest_id'] or message.id, message.id)
+                    checkpoint['messages'] = base_messages + messages_in_range
+                    checkpoint['reactions'] = base_reactions + reactions_count
+                
+                if progress is not None:
+                    progress.update(messages=messages_count, reactions=reactions_count, percent=progress_percent)
+                else:
+                    # Throttled by time, so fast channels don't flood the terminal or the journal
+                    renderer.update(
+                        messages_count, reactions_count, total=max(estimated_total, messages_count),
+                        detail=f"{messages_in_range:,} in range" if self.start_date or self.end_date else ''
+                    )
+            
+            # The backfill reached the beginning of the channel (or the start date). An empty
+            # channel stays incomplete: with no newest_id there is nothing to fetch after
+            if checkpoint is not None and limit is None and checkpoint['newest_id'] is not None:
+                checkpoint['complete'] = True
         
         except Exception as e:
-            print(f"\r     Error: {str(e)}")
+            print(f"\r     Error in #{channel.name}: {str(e)}")
         
         # Final status update with newline
-        if messages_count > 0:
+        if messages_count > 0 and progress is None:
             progress_percent = min(int((messages_count / estimated_total) * 100), 100)
             if self.start_date or self.end_date:
-                print(f"\r     ✅ {progress_percent:3d}% | {messages_count:,} messages ({messages_in_range:,} in range), {reactions_count:,} reactions")
+                renderer.finish(f"     ✅ {progress_percent:3d}% | {messages_count:,} messages ({messages_in_range:,} in range), {reactions_count:,} reactions")
             else:
-                print(f"\r     ✅ {progress_percent:3d}% | {messages_count:,} messages, {reactions_count:,} reactions")
+                renderer.finish(f"     ✅ {progress_percent:3d}% | {messages_count:,} messages, {reactions_count:,} reactions")
         
         return messages_in_range, reactions_count
     
@@ -389,7 +749,10 @@ class DiscordAnalyticsReporter:
         total_reactions_received = sum(stats['total_reactions_received'] for stats in user_stats.values())
         
         print(f"Total Messages: {total_messages:,}")
-        print(f"Total Reactions Given: {total_reactions_given:,}")
+        if self.scan_mode == 'count':
+            print("Total Reactions Given: not collected (--scan-mode=count)")
+        else:
+            print(f"Total Reactions Given: {total_reactions_given:,}")
         print(f"Total Reactions Received: {total_reactions_received:,}")
         
         if total_messages > 0:
@@ -471,14 +834,16 @@ def parse_date(date_str):
 
 def main():
     """Main function"""
-    import sys
-    
     print("🚀 Starting Standalone Discord Analytics Admin Report Generator...")
     print(f"🐍 Python Version: {sys.version.split()[0]}")
     
     # Parse command line arguments for date range
     start_date = None
     end_date = None
+    concurrency = None
+    scan_mode = None
+    workers = None
+    resume = True
     
     if len(sys.argv) > 1:
         print("\n📅 Date Range Parameters:")
@@ -499,12 +864,39 @@ def main():
                 except ValueError as e:
                     print(f"❌ Error: {e}")
                     return
+            elif arg.startswith('--concurrency='):
+                try:
+                    concurrency = max(1, int(arg.split('=', 1)[1]))
+                    print(f"   Reaction fetch concurrency: {concurrency}")
+                except ValueError:
+                    print(f"❌ Error: Invalid concurrency '{arg.split('=', 1)[1]}'. Use a whole number.")
+                    return
+            elif arg.startswith('--workers='):
+                try:
+                    workers = max(1, int(arg.split('=', 1)[1]))
+                    print(f"   Channel workers: {workers}")
+                except ValueError:
+                    print(f"❌ Error: Invalid worker count '{arg.split('=', 1)[1]}'. Use a whole number.")
+                    return
+            elif arg == '--rescan':
+                resume = False
+                print("   Rescan: ignoring saved scan checkpoints")
+            elif arg.startswith('--scan-mode='):
+                scan_mode = arg.split('=', 1)[1].lower()
+                if scan_mode not in ('full', 'count'):
+                    print(f"❌ Error: Invalid scan mode '{scan_mode}'. Use full or count.")
+                    return
+                print(f"   Scan mode: {scan_mode}")
             elif arg in ['--help', '-h']:
                 print("\n📋 Usage:")
                 print("  python 01-DiscordBot-Users_Stats-RunMe-ForAdminExternalConsole.py [options]")
                 print("\n🔧 Options:")
                 print("  --start=YYYY-MM-DD, -s=YYYY-MM-DD    Start date for analysis")
                 print("  --end=YYYY-MM-DD, -e=YYYY-MM-DD      End date for analysis")
+                print("  --concurrency=N                      Reaction user lists fetched in parallel (default 4)")
+                print("  --workers=N                          Channels scanned in parallel across all servers (default 4)")
+                print("  --rescan                             Ignore saved checkpoints and scan every channel from scratch")
+                print("  --scan-mode=full|count               count: reactions received only, from reaction counts (much faster)")
                 print("  --help, -h                           Show this help message")
                 print("\n📝 Examples:")
                 print("  # Analyze all messages from 2024-01-01 onwards:")
@@ -544,6 +936,11 @@ def main():
     print("="*60)
     print()
     
+    # Progress output frequency (terminal redraws / log lines when stdout is not a TTY)
+    global PROGRESS_REFRESH_SECONDS, PROGRESS_LOG_SECONDS
+    PROGRESS_REFRESH_SECONDS = float(os.getenv('PROGRESS_REFRESH_SECONDS', PROGRESS_REFRESH_SECONDS))
+    PROGRESS_LOG_SECONDS = float(os.getenv('PROGRESS_LOG_SECONDS', PROGRESS_LOG_SECONDS))
+    
     # Get the bot token
     token = os.getenv('DISCORD_BOT_TOKEN')
     
@@ -558,7 +955,19 @@ def main():
     
     try:
         # Create and run the reporter with date range
-        reporter = DiscordAnalyticsReporter(token, start_date, end_date)
+        if concurrency is None:
+            concurrency = max(1, int(os.getenv('REACTION_FETCH_CONCURRENCY', 4)))
+        if scan_mode is None:
+            scan_mode = os.getenv('SCAN_MODE', 'full').lower()
+            if scan_mode not in ('full', 'count'):
+                scan_mode = 'full'
+        if workers is None:
+            workers = max(1, int(os.getenv('SCAN_WORKERS', 4)))
+        reporter = DiscordAnalyticsReporter(
+            token, start_date, end_date,
+            reaction_concurrency=concurrency, scan_mode=scan_mode, channel_workers=workers,
+            resume=resume, checkpoint_interval=float(os.getenv('CHECKPOINT_INTERVAL_SECONDS', 30))
+        )
         asyncio.run(reporter.run())
         
     except KeyboardInterrupt:
@@ -1,12 +1,29 @@
 import discord
 from discord.ext import commands
+import contextlib
+import functools
+import heapq
+import itertools
 import json
 import os
 import sys
 import logging
-from datetime import datetime, timezone
-from collections import defaultdict
+import lzma
+import mmap
+import shutil
+import signal
+import sqlite3
+import struct
+import threading
+import time
+import traceback
+import zlib
+from datetime import date, datetime, timezone
+from collections import OrderedDict, defaultdict, deque
 import asyncio
+import bisect
+import typing
+from array import array
 
 # Debug mode flag (will be set after loading environment variables)
 DEBUG_MODE = False
@@ -39,14 +56,329 @@ def setup_logging():
 logger = setup_logging()
 
 
+# Latency histogram bucket bounds in seconds (1-2-5 steps from 10 µs to 5 minutes)
+LATENCY_BUCKETS = (
+    0.00001, 0.00002, 0.00005, 0.0001, 0.0002, 0.0005, 0.001, 0.002, 0.005, 0.01, 0.02, 0.05,
+    0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 20.0, 50.0, 100.0, 300.0
+)
+
+class LatencyHistogram:
+    """
+    Fixed-bucket latency histogram for one operation.
+    
+    Observations only increment a bucket counter, so memory stays constant however long
+    the bot runs. Percentiles are interpolated inside the bucket they fall in (the same
+    estimate Prometheus' histogram_quantile() makes) and capped at the slowest observation.
+    """
+    
+    __slots__ = ('counts', 'count', 'total', 'max', 'errors')
+    
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)  # Last bucket is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.errors = 0
+    
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+    
+    def percentile(self, q):
+        """Estimated latency below which a fraction q (0..1) of the observations fall"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                if index == len(LATENCY_BUCKETS):
+                    return self.max
+                lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+                upper = LATENCY_BUCKETS[index]
+                return min(lower + (upper - lower) * (rank - seen) / bucket_count, self.max)
+            seen += bucket_count
+        return self.max
+
+class PerfMetrics:
+    """
+    Latency histograms and counters for event handlers, commands, storage writes and
+    Discord API calls, shown by !stats_perf and written to a Prometheus text file.
+    
+    Operations are named '<group>.<name>' (e.g. 'event.on_message', 'command.stats',
+    'discord_api.GET /channels/{channel_id}/messages'). Storage snapshots are written from
+    a worker thread, so updates take a lock.
+    """
+    
+    def __init__(self):
+        self.histograms = {}  # operation -> LatencyHistogram
+        self.counters = defaultdict(int)  # name -> count
+        self.started = time.time()
+        self.path = None  # Prometheus text file, once started
+        self._lock = threading.Lock()
+        self._task = None
+    
+    def observe(self, name, seconds, error=False):
+        """Record one timed operation (error: it raised)"""
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.observe(seconds)
+            if error:
+                histogram.errors += 1
+    
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+    
+    @contextlib.contextmanager
+    def timer(self, name):
+        """Time the enclosed block; an exception leaving it counts as an error"""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.observe(name, time.perf_counter() - started, error=True)
+            raise
+        self.observe(name, time.perf_counter() - started)
+    
+    def timed(self, name):
+        """Decorator timing every call of a function or coroutine function"""
+        def decorator(func):
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def wrapper(*args, **kwargs):
+                    with self.timer(name):
+                        return await func(*args, **kwargs)
+            else:
+                @functools.wraps(func)
+                def wrapper(*args, **kwargs):
+                    with self.timer(name):
+                        return func(*args, **kwargs)
+            return wrapper
+        return decorator
+    
+    def summary(self):
+        """Per-operation rows sorted by total time: (name, count, p50, p95, p99, max, errors)"""
+        with self._lock:
+            histograms = sorted(self.histograms.items(), key=lambda item: item[1].total, reverse=True)
+            return [
+                (name, h.count, h.percentile(0.50), h.percentile(0.95), h.percentile(0.99), h.max, h.errors)
+                for name, h in histograms
+            ]
+    
+    def counter_values(self):
+        """Counters as sorted (name, value) pairs"""
+        with self._lock:
+            return sorted(self.counters.items())
+    
+    def prometheus_text(self):
+        """All metrics in the Prometheus text exposition format"""
+        def label(value):
+            return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        
+        lines = [
+            '# HELP discord_bot_start_time_seconds Unix time the bot process started',
+            '# TYPE discord_bot_start_time_seconds gauge',
+            f'discord_bot_start_time_seconds {self.started:.3f}',
+            '# HELP discord_bot_latency_seconds Time spent in event handlers, commands, storage writes and Discord API calls',
+            '# TYPE discord_bot_latency_seconds histogram'
+        ]
+        errors = []
+        with self._lock:
+            for name, h in sorted(self.histograms.items()):
+                op = label(name)
+                cumulative = 0
+                for bound, bucket_count in zip(LATENCY_BUCKETS, h.counts):
+                    cumulative += bucket_count
+                    lines.append(f'discord_bot_latency_seconds_bucket{{op="{op}",le="{bound:g}"}} {cumulative}')
+                lines.append(f'discord_bot_latency_seconds_bucket{{op="{op}",le="+Inf"}} {h.count}')
+                lines.append(f'discord_bot_latency_seconds_sum{{op="{op}"}} {h.total:.6f}')
+                lines.append(f'discord_bot_latency_seconds_count{{op="{op}"}} {h.count}')
+                errors.append(f'discord_bot_errors_total{{op="{op}"}} {h.errors}')
+        counters = self.counter_values()
+        
+        lines.append('# HELP discord_bot_errors_total Timed operations that raised an exception')
+        lines.append('# TYPE discord_bot_errors_total counter')
+        lines.extend(errors)
+        lines.append('# HELP discord_bot_events_total Event counters (ignored events, flushed records, ...)')
+        lines.append('# TYPE discord_bot_events_total counter')
+        lines.extend(f'discord_bot_events_total{{name="{label(name)}"}} {value}' for name, value in counters)
+        return '\n'.join(lines) + '\n'
+    
+    def write(self, path):
+        """Atomically replace the metrics file (scrapers never see a partial file)"""
+        temp_file = path + '.tmp'
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                f.write(self.prometheus_text())
+            os.replace(temp_file, path)
+        except OSError as e:
+            logger.warning(f"Could not write metrics file {path}: {e}")
+    
+    def start(self, path, interval):
+        """Start writing the metrics file every interval seconds (no-op without a path)"""
+        if path and self._task is None:
+            self.path = path
+            self._task = asyncio.create_task(self._run(interval))
+    
+    async def stop(self):
+        """Stop the writer and write the final numbers"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self.write(self.path)
+    
+    async def _run(self, interval):
+        while True:
+            self.write(self.path)
+            await asyncio.sleep(interval)
+
+# Process-wide metrics (the handlers below are timed from import time on)
+perf = PerfMetrics()
+
+class LoopMonitor:
+    """
+    Event loop lag sampler and slow-callback detector.
+    
+    A sampler task sleeps for interval seconds and records how late it wakes up as the
+    'event_loop.lag' histogram. A watchdog thread notices when the sampler has not run for
+    longer than interval + threshold, which means a callback is blocking the loop, and grabs
+    the loop thread's stack while it is still blocked. Once the loop recovers the stall is
+    logged with its duration, the code path it was in and that stack, and counted in perf.
+    
+    Args:
+        interval: Seconds between lag samples
+        threshold: Blocking time in seconds that counts as a stall
+    """
+    
+    def __init__(self, interval=0.5, threshold=0.25):
+        self.interval = interval
+        self.threshold = threshold
+        self.stalls = deque(maxlen=10)  # Recent (unix time, seconds, where) for !stats_perf
+        self._tick = None  # Monotonic time the sampler last ran
+        self._captured = None  # (where, stack) grabbed by the watchdog during the current stall
+        self._loop_thread = None
+        self._stopped = threading.Event()
+        self._task = None
+    
+    def start(self):
+        """Start the sampler and watchdog (must be called from the running event loop)"""
+        if self._task is None:
+            self._loop_thread = threading.get_ident()
+            self._tick = time.monotonic()
+            self._stopped.clear()
+            self._task = asyncio.create_task(self._sample())
+            threading.Thread(target=self._watch, name='loop-watchdog', daemon=True).start()
+    
+    async def stop(self):
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+    
+    async def _sample(self):
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self._tick = now
+            lag = max(0.0, now - expected)
+            perf.observe('event_loop.lag', lag)
+            
+            captured, self._captured = self._captured, None
+            if lag >= self.threshold or captured is not None:
+                self._report(lag, captured)
+    
+    def _report(self, lag, captured):
+        # Stalls too short for the watchdog to catch are still reported, just without a stack
+        where, stack = captured or ('unknown (no stack captured)', '')
+        self.stalls.append((time.time(), lag, where))
+        perf.count('event_loop.stalls')
+        perf.count(f'event_loop.stalls.{where}')
+        logger.warning(f"Event loop blocked for {lag * 1000:.0f} ms in {where}" + (f"\n{stack}" if stack else ""))
+    
+    def _watch(self):
+        # Runs in its own thread, so it keeps going while the loop thread is stuck
+        while not self._stopped.wait(self.threshold / 2):
+            if self._captured is None and time.monotonic() - self._tick > self.interval + self.threshold:
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is not None:
+                    self._captured = self._describe(frame)
+    
+    @staticmethod
+    def _describe(frame):
+        """(where, stack): the bot's own functions on the stack (outermost -> innermost) and the formatted stack"""
+        entries = traceback.extract_stack(frame)
+        # Drop the event loop's own frames above the callback that is running
+        for index in range(len(entries) - 1, -1, -1):
+            if entries[index].name == '_run' and entries[index].filename == asyncio.events.__file__:
+                entries = entries[index + 1:]
+                break
+        own = [entry.name for entry in entries if entry.filename == __file__]
+        if own:
+            where = own[0] if len(own) == 1 else f"{own[0]} -> {own[-1]}"
+        else:
+            innermost = entries[-1]
+            where = f"{os.path.basename(innermost.filename)}:{innermost.name}"
+        return where, ''.join(traceback.format_list(entries[-15:])).rstrip()
+    
+    def stats(self):
+        """Settings and the most recent stalls, for monitoring"""
+        return {
+            'interval': self.interval,
+            'threshold': self.threshold,
+            'recent_stalls': list(self.stalls)
+        }
+
+
 # Bot configuration
 intents = discord.Intents.default()
 intents.message_content = True
 intents.reactions = True
 intents.members = True
 
+class AnalyticsBot(commands.Bot):
+    """Bot with background persistence started on setup and flushed on shutdown"""
+
+    async def setup_hook(self):
+        storage.start()
+        
+        # Every REST call goes through HTTPClient.request; time it per route template
+        request = self.http.request
+        async def timed_request(route, **kwargs):
+            with perf.timer(f'discord_api.{route.method} {route.path}'):
+                return await request(route, **kwargs)
+        self.http.request = timed_request
+        perf.start(METRICS_FILE, METRICS_INTERVAL)
+        loop_monitor.start()
+        
+        # systemd stops the service with SIGTERM; close cleanly so pending data gets flushed
+        try:
+            asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, lambda: asyncio.create_task(self.close()))
+        except (NotImplementedError, RuntimeError):
+            pass  # Signal handlers are not supported on Windows event loops
+    
+    async def close(self):
+        await loop_monitor.stop()
+        await storage.stop()
+        await perf.stop()
+        await super().close()
+
 # Create bot with explicit shard configuration to prevent double connections
-bot = commands.Bot(
+bot = AnalyticsBot(
     command_prefix='!', 
     intents=intents,
     max_messages=1000,  # Limit message cache
@@ -55,9 +387,50 @@ bot = commands.Bot(
 
 # Data storage
 DATA_FILE = '12-DiscordBot-Users_Stats-DataReport_Output.json'
+JOURNAL_FILE = '12-DiscordBot-Users_Stats-DataReport_Journal.jsonl'
+ROTATED_JOURNAL_FILE = JOURNAL_FILE + '.old'  # Journal being folded into a snapshot
+DATABASE_FILE = '12-DiscordBot-Users_Stats-DataReport_Output.sqlite3'
+SNAPSHOT_FILE = '12-DiscordBot-Users_Stats-DataReport_Snapshot.bin'
+BACKFILL_FILE = '12-DiscordBot-Users_Stats-DataReport_Backfill.json'
+NAMES_FILE = '12-DiscordBot-Users_Stats-DataReport_Names.json'
+DAYS_FILE = '12-DiscordBot-Users_Stats-DataReport_Days.bin'
+METRICS_FILE = ''  # Set from METRICS_FILE in main() (off unless set)
+METRICS_INTERVAL = 15.0  # Seconds between metrics file writes
+
+# Journal event kinds: one compact record per counter change
+EVENT_MESSAGE = 'm'
+EVENT_REACTION_GIVEN = 'g'
+EVENT_REACTION_RECEIVED = 'r'
+
+def to_defaultdicts(data):
+    """Convert plain nested dicts in the JSON layout into the live defaultdict layout"""
+    return {
+        'messages': defaultdict(lambda: defaultdict(int), {
+            user_id: defaultdict(int, channels) 
+            for user_id, channels in data.get('messages', {}).items()
+        }),
+        'reactions_given': defaultdict(lambda: defaultdict(lambda: defaultdict(int)), {
+            user_id: defaultdict(lambda: defaultdict(int), {
+                channel_id: defaultdict(int, emojis)
+                for channel_id, emojis in channels.items()
+            })
+            for user_id, channels in data.get('reactions_given', {}).items()
+        }),
+        'reactions_received': defaultdict(lambda: defaultdict(lambda: defaultdict(int)), {
+            user_id: defaultdict(lambda: defaultdict(int), {
+                channel_id: defaultdict(int, emojis)
+                for channel_id, emojis in channels.items()
+            })
+            for user_id, channels in data.get('reactions_received', {}).items()
+        })
+    }
 
 def load_data():
-    """Load analytics data from JSON file"""
+    """Load analytics data from JSON file
+    
+    Returns:
+        tuple: (analytics data as defaultdicts, journal sequence number the snapshot includes)
+    """
     if os.path.exists(DATA_FILE):
         if DEBUG_MODE:
             print(f"🔍 DEBUG: Loading existing data from {DATA_FILE}")
@@ -72,31 +445,12 @@ def load_data():
             print(f"     Reactions Received: {len(data.get('reactions_received', {}))} users")
         
         # Convert loaded data back to defaultdicts
-        converted_data = {
-            'messages': defaultdict(lambda: defaultdict(int), {
-                user_id: defaultdict(int, channels) 
-                for user_id, channels in data.get('messages', {}).items()
-            }),
-            'reactions_given': defaultdict(lambda: defaultdict(lambda: defaultdict(int)), {
-                user_id: defaultdict(lambda: defaultdict(int), {
-                    channel_id: defaultdict(int, emojis)
-                    for channel_id, emojis in channels.items()
-                })
-                for user_id, channels in data.get('reactions_given', {}).items()
-            }),
-            'reactions_received': defaultdict(lambda: defaultdict(lambda: defaultdict(int)), {
-                user_id: defaultdict(lambda: defaultdict(int), {
-                    channel_id: defaultdict(int, emojis)
-                    for channel_id, emojis in channels.items()
-                })
-                for user_id, channels in data.get('reactions_received', {}).items()
-            })
-        }
+        converted_data = to_defaultdicts(data)
         
         if DEBUG_MODE:
             print(f"   ✅ Data converted to defaultdicts successfully")
         
-        return converted_data
+        return converted_data, data.get('journal_seq', 0)
     else:
         if DEBUG_MODE:
             print(f"🔍 DEBUG: No existing data file found ({DATA_FILE}), creating new data structure")
@@ -105,10 +459,19 @@ def load_data():
             'messages': defaultdict(lambda: defaultdict(int)),  # user_id -> channel_id -> count
             'reactions_given': defaultdict(lambda: defaultdict(lambda: defaultdict(int))),  # user_id -> channel_id -> emoji -> count
             'reactions_received': defaultdict(lambda: defaultdict(lambda: defaultdict(int)))  # user_id -> channel_id -> emoji -> count
-        }
+        }, 0
 
-def save_data(data):
-    """Save analytics data to JSON file"""
+@perf.timed('storage.save_data')
+def save_data(data, journal_seq=0):
+    """Save analytics data to JSON file
+    
+    Args:
+        data: Analytics data to write
+        journal_seq: Sequence number of the last journal event included in this snapshot
+    
+    Returns:
+        bool: True if the snapshot was written
+    """
     if DEBUG_MODE:
         print(f"🔍 DEBUG: Saving data to {DATA_FILE}")
         print(f"   📊 Current data counts:")
@@ -120,163 +483,3052 @@ def save_data(data):
     json_data = {
         'messages': dict(data['messages']),
         'reactions_given': dict(data['reactions_given']),
-        'reactions_received': dict(data['reactions_received'])
+        'reactions_received': dict(data['reactions_received']),
+        'journal_seq': journal_seq
     }
     
     try:
-        with open(DATA_FILE, 'w', encoding='utf-8') as f:
+        # Write to a temp file and swap it in, so a crash never leaves a half-written snapshot
+        temp_file = DATA_FILE + '.tmp'
+        with open(temp_file, 'w', encoding='utf-8') as f:
             json.dump(json_data, f, indent=2, ensure_ascii=False)
+        os.replace(temp_file, DATA_FILE)
         
         if DEBUG_MODE:
             print(f"   ✅ Data saved successfully")
+        return True
     except Exception as e:
         if DEBUG_MODE:
             print(f"   ❌ Error saving data: {e}")
         else:
-            print(f"❌ Error saving analytics data: {e}")
-
-def parse_date(date_str):
-    """Parse date string in YYYY-MM-DD format and make it timezone-aware (UTC)"""
-    try:
-        # Parse the date and make it timezone-aware (UTC) to match Discord timestamps
-        naive_date = datetime.strptime(date_str, '%Y-%m-%d')
-        return naive_date.replace(tzinfo=timezone.utc)
-    except ValueError:
-        raise ValueError(f"Invalid date format: {date_str}. Use YYYY-MM-DD format.")
+            print(f"❌ Error saving analytics data: {e}")
+        return False
+
+def apply_event(data, kind, user_id, channel_id, delta, emoji=None):
+    """Apply one counter change to analytics data (shared by live events and journal replay)
+    
+    Returns:
+        int: The change actually applied (removals of unknown counters apply nothing)
+    """
+    if kind == EVENT_MESSAGE:
+        data['messages'][user_id][channel_id] += delta
+        return delta
+    
+    category = 'reactions_given' if kind == EVENT_REACTION_GIVEN else 'reactions_received'
+    if delta > 0:
+        data[category][user_id][channel_id][emoji] += delta
+        return delta
+    
+    # Removals only decrement counters we know about, and drop them once they reach zero
+    user_data = data[category].get(user_id)
+    if user_data is None or channel_id not in user_data or emoji not in user_data[channel_id]:
+        return 0
+    old_count = user_data[channel_id][emoji]
+    if old_count + delta <= 0:
+        del user_data[channel_id][emoji]
+        return -old_count
+    user_data[channel_id][emoji] = old_count + delta
+    return delta
+
+def replay_journal(data, after_seq, before_apply=None, days=None):
+    """
+    Apply journal records newer than the snapshot on top of the loaded data.
+    
+    Reads the rotated journal left by an unfinished compaction first, then the live journal.
+    
+    Args:
+        data: Analytics data loaded from the snapshot
+        after_seq: Journal sequence number already included in the snapshot
+        before_apply: Optional callback given each record's channel ID before it is applied
+        days: Optional DayBuckets; dated records newer than days.seq are applied to it too
+    
+    Returns:
+        tuple: (last sequence number seen, number of records replayed)
+    """
+    last_seq = after_seq
+    replayed = 0
+    
+    for journal_file in (ROTATED_JOURNAL_FILE, JOURNAL_FILE):
+        if not os.path.exists(journal_file):
+            continue
+        
+        line = '\n'
+        with open(journal_file, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                try:
+                    seq, kind, user_id, channel_id, delta, *rest = json.loads(line)
+                except ValueError:
+                    # A crash mid-append can leave a partial last line; skip anything unreadable
+                    print(f"⚠️  Skipping unreadable journal line {line_number} in {journal_file}")
+                    continue
+                
+                # Optional fields: emoji (null for messages), then the day ordinal
+                emoji = rest[0] if rest else None
+                day = rest[1] if len(rest) > 1 else None
+                
+                # The day bucket file is saved separately and may cover a different sequence number
+                if days is not None and day is not None and seq > days.seq:
+                    days.add(kind, user_id, channel_id, day, delta)
+                
+                # Records already folded into the snapshot (crash between snapshot and cleanup)
+                if seq <= after_seq:
+                    continue
+                
+                if before_apply is not None:
+                    before_apply(channel_id)
+                apply_event(data, kind, user_id, channel_id, delta, emoji)
+                last_seq = max(last_seq, seq)
+                replayed += 1
+        
+        # Terminate a torn last line so new records don't get glued onto it
+        if not line.endswith('\n'):
+            with open(journal_file, 'a', encoding='utf-8') as f:
+                f.write('\n')
+    
+    if DEBUG_MODE:
+        print(f"🔍 DEBUG: Replayed {replayed} journal event(s)")
+    
+    return last_seq, replayed
+
+def snapshot_copy(data):
+    """Consistent plain-dict copy of analytics data that a worker thread can serialize safely"""
+    return {
+        'messages': {user_id: dict(channels) for user_id, channels in data['messages'].items()},
+        'reactions_given': {
+            user_id: {channel_id: dict(emojis) for channel_id, emojis in channels.items()}
+            for user_id, channels in data['reactions_given'].items()
+        },
+        'reactions_received': {
+            user_id: {channel_id: dict(emojis) for channel_id, emojis in channels.items()}
+            for user_id, channels in data['reactions_received'].items()
+        }
+    }
+
+class ChannelCounterTable:
+    """
+    Counters for one channel packed into parallel typed arrays.
+    
+    Rows are sorted by user ID (then emoji ID) so lookups use bisect instead of per-row
+    dicts. Reaction rows with emoji ID 0 mark a user whose emoji dict exists but is empty.
+    """
+    
+    __slots__ = (
+        'message_users', 'message_counts',
+        'given_users', 'given_emojis', 'given_counts',
+        'received_users', 'received_emojis', 'received_counts'
+    )
+    
+    def __init__(self):
+        self.message_users = array('Q')
+        self.message_counts = array('I')
+        self.given_users = array('Q')
+        self.given_emojis = array('I')
+        self.given_counts = array('I')
+        self.received_users = array('Q')
+        self.received_emojis = array('I')
+        self.received_counts = array('I')
+    
+    def reaction_arrays(self, category):
+        if category == 'reactions_given':
+            return self.given_users, self.given_emojis, self.given_counts
+        return self.received_users, self.received_emojis, self.received_counts
+
+class CompactCounterStore:
+    """
+    Memory-compact, picklable form of analytics data.
+    
+    Discord snowflakes are stored as integers, emoji strings are interned once in a
+    shared table and referenced by small integer IDs, and every channel keeps its
+    counters in a ChannelCounterTable instead of nested dicts. Converts losslessly to
+    and from the JSON file layout.
+    """
+    
+    __slots__ = ('channels', 'emojis', 'emoji_ids')
+    
+    def __init__(self):
+        self.channels = {}  # channel snowflake -> ChannelCounterTable
+        self.emojis = ['']  # emoji ID -> emoji string (0 marks an empty emoji dict)
+        self.emoji_ids = {'': 0}
+    
+    def intern_emoji(self, emoji):
+        emoji_id = self.emoji_ids.get(emoji)
+        if emoji_id is None:
+            emoji_id = self.emoji_ids[emoji] = len(self.emojis)
+            self.emojis.append(emoji)
+        return emoji_id
+    
+    @staticmethod
+    def _snowflake(value):
+        snowflake = int(value)
+        if str(snowflake) != value:
+            raise ValueError(f"ID {value!r} does not round-trip as an integer snowflake")
+        return snowflake
+    
+    @classmethod
+    def from_json_data(cls, data):
+        """Build a compact store from the JSON layout (user_id -> channel_id -> ...)"""
+        store = cls()
+        message_rows = defaultdict(list)
+        reaction_rows = {'reactions_given': defaultdict(list), 'reactions_received': defaultdict(list)}
+        
+        for user_id, channels in data['messages'].items():
+            user = cls._snowflake(user_id)
+            for channel_id, count in channels.items():
+                message_rows[cls._snowflake(channel_id)].append((user, count))
+        
+        for category, rows in reaction_rows.items():
+            for user_id, channels in data[category].items():
+                user = cls._snowflake(user_id)
+                for channel_id, emojis in channels.items():
+                    channel_rows = rows[cls._snowflake(channel_id)]
+                    if not emojis:
+                        channel_rows.append((user, 0, 0))
+                    for emoji, count in emojis.items():
+                        channel_rows.append((user, store.intern_emoji(emoji), count))
+        
+        for channel, rows in message_rows.items():
+            table = store.channels.setdefault(channel, ChannelCounterTable())
+            for user, count in sorted(rows):
+                table.message_users.append(user)
+                table.message_counts.append(count)
+        
+        for category, channel_rows in reaction_rows.items():
+            for channel, rows in channel_rows.items():
+                users, emoji_ids, counts = store.channels.setdefault(channel, ChannelCounterTable()).reaction_arrays(category)
+                for user, emoji_id, count in sorted(rows):
+                    users.append(user)
+                    emoji_ids.append(emoji_id)
+                    counts.append(count)
+        
+        return store
+    
+    def to_json_data(self):
+        """Expand back into the JSON layout with plain dicts"""
+        data = {'messages': {}, 'reactions_given': {}, 'reactions_received': {}}
+        
+        for channel, table in self.channels.items():
+            channel_id = str(channel)
+            for user, count in zip(table.message_users, table.message_counts):
+                data['messages'].setdefault(str(user), {})[channel_id] = count
+            
+            for category in ('reactions_given', 'reactions_received'):
+                for user, emoji_id, count in zip(*table.reaction_arrays(category)):
+                    emojis = data[category].setdefault(str(user), {}).setdefault(channel_id, {})
+                    if emoji_id:
+                        emojis[self.emojis[emoji_id]] = count
+        
+        return data
+    
+    def user_channel_stats(self, user_id, channel_id):
+        """A user's counters in a channel: (message_count, {emoji: given}, {emoji: received})"""
+        table = self.channels.get(int(channel_id))
+        if table is None:
+            return 0, {}, {}
+        user = int(user_id)
+        
+        index = bisect.bisect_left(table.message_users, user)
+        found = index < len(table.message_users) and table.message_users[index] == user
+        message_count = table.message_counts[index] if found else 0
+        
+        reactions = []
+        for category in ('reactions_given', 'reactions_received'):
+            users, emoji_ids, counts = table.reaction_arrays(category)
+            start = bisect.bisect_left(users, user)
+            end = bisect.bisect_right(users, user, start)
+            reactions.append({
+                self.emojis[emoji_ids[i]]: counts[i] for i in range(start, end) if emoji_ids[i]
+            })
+        
+        return message_count, reactions[0], reactions[1]
+
+# Binary snapshot layout (all integers little-endian):
+#   header:  magic, format version, compression, reserved, journal_seq, index offset
+#   blocks:  the emoji table (count, UTF-8 byte lengths, UTF-8 blob), then one block per
+#            channel holding its ChannelCounterTable arrays in slot order, each as an element
+#            count plus the raw array bytes; every block is compressed on its own
+#   index:   emoji block offset and length, then the channel snowflakes, block offsets and
+#            block lengths as three arrays, so one channel can be read without the others
+SNAPSHOT_MAGIC = b'DBUS'
+SNAPSHOT_VERSION = 2
+SNAPSHOT_COMPRESSION = {'none': 0, 'zlib': 1, 'lzma': 2}
+SNAPSHOT_HEADER = struct.Struct('<4sHBBQQ')
+SNAPSHOT_BLOCK = struct.Struct('<QQ')
+SNAPSHOT_ARRAY_TYPES = {'message_users': 'Q', 'given_users': 'Q', 'received_users': 'Q'}  # Everything else is 'I'
+
+def _pack_array(parts, values):
+    if sys.byteorder != 'little':
+        values = array(values.typecode, values)
+        values.byteswap()
+    parts.append(struct.pack('<I', len(values)))
+    parts.append(values.tobytes())
+
+def _unpack_array(view, offset, typecode):
+    (count,) = struct.unpack_from('<I', view, offset)
+    offset += 4
+    values = array(typecode)
+    end = offset + count * values.itemsize
+    if end > len(view):
+        raise ValueError("Snapshot block is truncated")
+    values.frombytes(view[offset:end])
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values, end
+
+def _compress_block(payload, compression):
+    if compression == 'zlib':
+        return zlib.compress(payload, 6)
+    if compression == 'lzma':
+        return lzma.compress(payload)
+    return payload
+
+def encode_snapshot(store, journal_seq, compression='zlib'):
+    """Serialize a CompactCounterStore into the versioned binary snapshot format"""
+    blocks = []
+    offset = SNAPSHOT_HEADER.size
+    
+    def add_block(parts):
+        nonlocal offset
+        block = _compress_block(b''.join(parts), compression)
+        blocks.append(block)
+        offset += len(block)
+        return offset - len(block), len(block)
+    
+    parts = []
+    encoded_emojis = [emoji.encode('utf-8') for emoji in store.emojis]
+    parts.append(struct.pack('<I', len(encoded_emojis)))
+    _pack_array(parts, array('I', [len(emoji) for emoji in encoded_emojis]))
+    parts.append(b''.join(encoded_emojis))
+    emoji_block = add_block(parts)
+    
+    channels = array('Q', sorted(store.channels))
+    offsets = array('Q')
+    lengths = array('Q')
+    for channel in channels:
+        parts = []
+        table = store.channels[channel]
+        for slot in ChannelCounterTable.__slots__:
+            _pack_array(parts, getattr(table, slot))
+        block_offset, block_length = add_block(parts)
+        offsets.append(block_offset)
+        lengths.append(block_length)
+    
+    index = [SNAPSHOT_BLOCK.pack(*emoji_block)]
+    for values in (channels, offsets, lengths):
+        _pack_array(index, values)
+    
+    header = SNAPSHOT_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, SNAPSHOT_COMPRESSION[compression], 0, journal_seq, offset)
+    return b''.join([header, *blocks, *index])
+
+class SnapshotReader:
+    """
+    Random access to a binary snapshot held in any buffer (bytes or an mmap).
+    
+    Only the header, index and emoji table are decoded up front; channel blocks are
+    decompressed one at a time when read_channel() asks for them.
+    
+    Args:
+        buffer: Snapshot bytes
+        mapping: Optional mmap backing the buffer, closed together with the reader
+    """
+    
+    def __init__(self, buffer, mapping=None):
+        self._mapping = mapping
+        self._view = memoryview(buffer)
+        try:
+            self._read_index()
+        except Exception:
+            self.close()
+            raise
+    
+    def _read_index(self):
+        view = self._view
+        if len(view) < SNAPSHOT_HEADER.size:
+            raise ValueError("Snapshot is truncated")
+        magic, version, compression, _, self.journal_seq, index_offset = SNAPSHOT_HEADER.unpack_from(view)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("Not an analytics snapshot")
+        if version != SNAPSHOT_VERSION:
+            raise ValueError(f"Unsupported snapshot version {version}")
+        if index_offset + SNAPSHOT_BLOCK.size > len(view):
+            raise ValueError("Snapshot is truncated")
+        self.compression = compression
+        
+        emoji_block = SNAPSHOT_BLOCK.unpack_from(view, index_offset)
+        channels, offset = _unpack_array(view, index_offset + SNAPSHOT_BLOCK.size, 'Q')
+        offsets, offset = _unpack_array(view, offset, 'Q')
+        lengths, offset = _unpack_array(view, offset, 'Q')
+        if not len(channels) == len(offsets) == len(lengths):
+            raise ValueError("Snapshot index is corrupt")
+        self.blocks = {channel: (offsets[i], lengths[i]) for i, channel in enumerate(channels)}
+        
+        payload = self._block(*emoji_block)
+        (emoji_count,) = struct.unpack_from('<I', payload, 0)
+        emoji_lengths, offset = _unpack_array(payload, 4, 'I')
+        if len(emoji_lengths) != emoji_count:
+            raise ValueError("Snapshot emoji table is corrupt")
+        self.emojis = []
+        for length in emoji_lengths:
+            self.emojis.append(bytes(payload[offset:offset + length]).decode('utf-8'))
+            offset += length
+    
+    def _block(self, offset, length):
+        if offset + length > len(self._view):
+            raise ValueError("Snapshot block is truncated")
+        block = self._view[offset:offset + length]
+        if self.compression == SNAPSHOT_COMPRESSION['zlib']:
+            return memoryview(zlib.decompress(block))
+        if self.compression == SNAPSHOT_COMPRESSION['lzma']:
+            return memoryview(lzma.decompress(block))
+        return block
+    
+    def read_channel(self, channel):
+        """Decode one channel's ChannelCounterTable (None if the channel has no block)"""
+        location = self.blocks.get(channel)
+        if location is None:
+            return None
+        payload = self._block(*location)
+        table = ChannelCounterTable()
+        offset = 0
+        for slot in ChannelCounterTable.__slots__:
+            values, offset = _unpack_array(payload, offset, SNAPSHOT_ARRAY_TYPES.get(slot, 'I'))
+            setattr(table, slot, values)
+        return table
+    
+    def close(self):
+        """Release the buffer (and unmap the file)"""
+        self._view.release()
+        if self._mapping is not None:
+            self._mapping.close()
+            self._mapping = None
+
+def open_snapshot(path=None):
+    """Memory-map a binary snapshot file and read its index"""
+    with open(path or SNAPSHOT_FILE, 'rb') as f:
+        mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return SnapshotReader(mapping, mapping)
+
+def decode_snapshot(blob):
+    """Decode a whole binary snapshot; returns (CompactCounterStore, journal_seq)"""
+    reader = SnapshotReader(blob)
+    try:
+        store = CompactCounterStore()
+        store.emojis = reader.emojis
+        store.emoji_ids = {emoji: emoji_id for emoji_id, emoji in enumerate(store.emojis)}
+        for channel in reader.blocks:
+            store.channels[channel] = reader.read_channel(channel)
+        return store, reader.journal_seq
+    finally:
+        reader.close()
+
+@perf.timed('storage.save_binary_snapshot')
+def save_binary_snapshot(data, journal_seq=0, compression='zlib'):
+    """Save analytics data as a binary snapshot (temp file plus atomic swap)
+    
+    Returns:
+        bool: True if the snapshot was written
+    """
+    try:
+        blob = encode_snapshot(CompactCounterStore.from_json_data(data), journal_seq, compression)
+        temp_file = SNAPSHOT_FILE + '.tmp'
+        with open(temp_file, 'wb') as f:
+            f.write(blob)
+        os.replace(temp_file, SNAPSHOT_FILE)
+        
+        if DEBUG_MODE:
+            print(f"🔍 DEBUG: Binary snapshot saved ({len(blob):,} bytes, {compression})")
+        return True
+    except Exception as e:
+        print(f"❌ Error saving binary snapshot: {e}")
+        return False
+
+def load_snapshot(snapshot_format='binary'):
+    """
+    Load the newest snapshot for the configured format.
+    
+    With the binary format the binary snapshot is preferred; the JSON file is used when no
+    binary snapshot exists yet (migration from older versions) or when it cannot be read.
+    
+    Returns:
+        tuple: (analytics data as defaultdicts, journal sequence number the snapshot includes)
+    """
+    if snapshot_format == 'binary' and os.path.exists(SNAPSHOT_FILE):
+        try:
+            with open(SNAPSHOT_FILE, 'rb') as f:
+                store, journal_seq = decode_snapshot(f.read())
+            if DEBUG_MODE:
+                print(f"🔍 DEBUG: Loaded binary snapshot {SNAPSHOT_FILE} ({len(store.channels)} channels)")
+            return to_defaultdicts(store.to_json_data()), journal_seq
+        except (OSError, ValueError, zlib.error, lzma.LZMAError, struct.error) as e:
+            print(f"⚠️  Could not read {SNAPSHOT_FILE} ({e}); falling back to {DATA_FILE}")
+    
+    return load_data()
+
+# Per-day counters: each journal record may carry the UTC day of the message it belongs to
+# (a proleptic Gregorian day ordinal, as returned by date.toordinal())
+DAY_CATEGORIES = {
+    EVENT_MESSAGE: 'messages',
+    EVENT_REACTION_GIVEN: 'reactions_given',
+    EVENT_REACTION_RECEIVED: 'reactions_received'
+}
+EVENT_INDEX = {kind: index for index, kind in enumerate(DAY_CATEGORIES)}  # Position in a day bucket
+
+def day_ordinal(when):
+    """UTC calendar day of a datetime as a day ordinal (naive datetimes are taken as UTC)"""
+    if when.tzinfo is not None:
+        when = when.astimezone(timezone.utc)
+    return when.date().toordinal()
+
+def day_from_ordinal(day):
+    """Day ordinal back to a YYYY-MM-DD string"""
+    return date.fromordinal(day).isoformat()
+
+class DayPrefixSums:
+    """
+    Cumulative per-day counts for one series (a user's category in a channel, or a channel total).
+    
+    `days` holds the active day ordinals in ascending order, `counts[i]` the count of days[i]
+    and `sums[i]` the total up to and including days[i], so any date-range total is two
+    bisects and one subtraction. Live events land on the newest day, where an update is O(1).
+    A change to an older day (history scans, reactions to old messages) only updates its count
+    and marks the sums from there stale; the next range query recomputes them in one pass, so a
+    backfill costs one rebuild per touched series instead of one per event.
+    """
+    
+    __slots__ = ('days', 'counts', 'sums', 'stale_from')
+    
+    def __init__(self):
+        self.days = array('I')
+        self.counts = array('q')
+        self.sums = array('q')
+        self.stale_from = None  # Index of the first entry of sums that needs recomputing
+    
+    def add(self, day, delta):
+        days, counts, sums = self.days, self.counts, self.sums
+        last = len(days) - 1
+        if last >= 0 and days[last] == day:
+            counts[last] += delta
+            sums[last] += delta
+        elif last < 0 or days[last] < day:
+            days.append(day)
+            counts.append(delta)
+            sums.append((sums[last] if last >= 0 else 0) + delta)
+        else:
+            index = bisect.bisect_left(days, day)
+            if days[index] != day:
+                days.insert(index, day)
+                counts.insert(index, 0)
+                sums.insert(index, 0)
+            counts[index] += delta
+            if self.stale_from is None or index < self.stale_from:
+                self.stale_from = index
+    
+    def _rebuild(self):
+        start = self.stale_from
+        base = self.sums[start - 1] if start else 0
+        self.sums[start:] = array('q', itertools.accumulate(self.counts[start:], initial=base))[1:]
+        self.stale_from = None
+    
+    def range_total(self, start_day, end_day):
+        """Total over start_day..end_day (inclusive)"""
+        if self.stale_from is not None:
+            self._rebuild()
+        end = bisect.bisect_right(self.days, end_day)
+        if not end:
+            return 0
+        start = bisect.bisect_left(self.days, start_day, 0, end)
+        return self.sums[end - 1] - (self.sums[start - 1] if start else 0)
+
+class DayBuckets:
+    """
+    Message and reaction counters bucketed per channel and UTC day.
+    
+    Each (channel, day) bucket holds one user_id -> count dict per category, in
+    DAY_CATEGORIES order. Emojis are not kept per day; date-range queries only need the
+    per-user totals the leaderboards show.
+    
+    Loaded from DAYS_FILE lazily, like the binary snapshot: a channel's buckets are decoded
+    the first time an event or query touches it (or the storage warm-up reaches it). The
+    first range query for a channel mirrors its buckets into DayPrefixSums per user and
+    category and per channel category total, which are then updated with every change, so
+    a range total costs O(log days) and a range leaderboard one such lookup per user.
+    
+    Args:
+        reader: Optional DayBucketReader of the saved file; its channels are loaded on demand
+    """
+    
+    def __init__(self, reader=None):
+        self.channels = {}  # channel_id -> day ordinal -> (messages, given, received) dicts
+        self.users = {}  # channel_id -> per category: user_id -> DayPrefixSums (indexed channels only)
+        self.totals = {}  # channel_id -> per category: DayPrefixSums of the channel total
+        self.seq = reader.journal_seq if reader else 0  # Journal sequence number already included in the saved bucket file
+        self.unloaded = {str(channel) for channel in reader.blocks} if reader else set()  # Channel IDs not decoded yet
+        self._reader = reader  # DayBucketReader while channels are still unloaded
+        self._indexed = set()  # Channel IDs whose prefix sums are built
+        if reader is not None and not self.unloaded:
+            self.close()
+    
+    def load_channel(self, channel_id):
+        """Decode one channel's buckets from the file if they are still deferred"""
+        if channel_id not in self.unloaded:
+            return
+        self.unloaded.discard(channel_id)
+        self.channels[channel_id] = self._reader.read_channel(int(channel_id))
+        if not self.unloaded:
+            self.close()
+    
+    def load_all(self):
+        """Decode every channel still deferred (before the bucket file is replaced)"""
+        while self.unloaded:
+            self.load_channel(next(iter(self.unloaded)))
+    
+    def close(self):
+        """Release the bucket file; channels not loaded by then are dropped"""
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        self.unloaded = set()
+    
+    def add(self, kind, user_id, channel_id, day, delta):
+        """Apply one counter change; removals only decrement counts that exist"""
+        self.load_channel(channel_id)
+        days = self.channels.get(channel_id)
+        if days is None:
+            days = self.channels[channel_id] = {}
+        bucket = days.get(day)
+        if bucket is None:
+            if delta <= 0:
+                return
+            bucket = days[day] = ({}, {}, {})
+        
+        index = EVENT_INDEX[kind]
+        counts = bucket[index]
+        old_value = counts.get(user_id, 0)
+        value = old_value + delta
+        if value > 0:
+            counts[user_id] = value
+        else:
+            counts.pop(user_id, None)
+            value = 0
+        if value != old_value and channel_id in self._indexed:
+            self._index(channel_id, index, user_id, day, value - old_value)
+    
+    def _index(self, channel_id, index, user_id, day, delta):
+        users = self.users.get(channel_id)
+        if users is None:
+            users = self.users[channel_id] = ({}, {}, {})
+            self.totals[channel_id] = (DayPrefixSums(), DayPrefixSums(), DayPrefixSums())
+        sums = users[index].get(user_id)
+        if sums is None:
+            sums = users[index][user_id] = DayPrefixSums()
+        sums.add(day, delta)
+        self.totals[channel_id][index].add(day, delta)
+    
+    def _ensure_index(self, channel_id):
+        """Build a channel's prefix sums from its buckets (oldest day first, so every update appends)"""
+        self.load_channel(channel_id)
+        if channel_id in self._indexed:
+            return
+        self._indexed.add(channel_id)
+        days = self.channels.get(channel_id, {})
+        for day in sorted(days):
+            for index, counts in enumerate(days[day]):
+                for user_id, count in counts.items():
+                    self._index(channel_id, index, user_id, day, count)
+    
+    def range_scores(self, channel_id, start_day, end_day):
+        """Per-user totals over the days start_day..end_day (inclusive): {category: {user_id: score}}"""
+        self._ensure_index(channel_id)
+        scores = {}
+        for category, users in zip(DAY_CATEGORIES.values(), self.users.get(channel_id, ({}, {}, {}))):
+            category_scores = scores[category] = {}
+            for user_id, sums in users.items():
+                total = sums.range_total(start_day, end_day)
+                if total > 0:
+                    category_scores[user_id] = total
+        return scores
+    
+    def range_totals(self, channel_id, start_day, end_day):
+        """Channel totals per category over a day range, without visiting users"""
+        self._ensure_index(channel_id)
+        totals = self.totals.get(channel_id)
+        return {
+            category: totals[index].range_total(start_day, end_day) if totals else 0
+            for index, category in enumerate(DAY_CATEGORIES.values())
+        }
+    
+    def copy(self):
+        """Plain copy of the loaded buckets (without the index) that a worker thread can encode"""
+        copied = DayBuckets()
+        copied.channels = {
+            channel_id: {day: tuple(dict(counts) for counts in bucket) for day, bucket in days.items()}
+            for channel_id, days in self.channels.items()
+        }
+        return copied
+    
+    def __len__(self):
+        return sum(len(days) for days in self.channels.values())
+
+# Day bucket file layout (little-endian), like the binary snapshot: header (magic, format version,
+# compression, reserved, journal_seq, index offset), one compressed block per channel, then the
+# index (parallel arrays of channel snowflakes, block offsets and block lengths). A channel block
+# holds four parallel arrays, one row per (day, category, user) counter: day ordinals, category
+# indexes, user snowflakes and counts, sorted in that order so the columns compress well.
+# Version 1 files (one block for all channels, with a channel column) are still read, eagerly.
+DAYS_MAGIC = b'DBUD'
+DAYS_VERSION = 2
+DAYS_HEADER = struct.Struct('<4sHBBQQ')
+DAYS_HEADER_V1 = struct.Struct('<4sHBBQ')
+DAYS_ARRAY_TYPES = ('I', 'B', 'Q', 'I')
+DAYS_ARRAY_TYPES_V1 = ('Q', 'I', 'B', 'Q', 'I')
+
+def encode_day_buckets(days, journal_seq, compression='zlib'):
+    """Serialize DayBuckets into the versioned day bucket file format"""
+    blocks = []
+    offset = DAYS_HEADER.size
+    channels = array('Q')
+    offsets = array('Q')
+    lengths = array('Q')
+    for channel_id in sorted(days.channels, key=int):
+        columns = [array(typecode) for typecode in DAYS_ARRAY_TYPES]
+        day_col, category_col, user_col, count_col = columns
+        for day, bucket in sorted(days.channels[channel_id].items()):
+            for index, counts in enumerate(bucket):
+                for user, count in sorted((CompactCounterStore._snowflake(user_id), count) for user_id, count in counts.items()):
+                    day_col.append(day)
+                    category_col.append(index)
+                    user_col.append(user)
+                    count_col.append(count)
+        if not day_col:
+            continue
+        
+        parts = []
+        for values in columns:
+            _pack_array(parts, values)
+        block = _compress_block(b''.join(parts), compression)
+        blocks.append(block)
+        channels.append(CompactCounterStore._snowflake(channel_id))
+        offsets.append(offset)
+        lengths.append(len(block))
+        offset += len(block)
+    
+    index = []
+    for values in (channels, offsets, lengths):
+        _pack_array(index, values)
+    header = DAYS_HEADER.pack(DAYS_MAGIC, DAYS_VERSION, SNAPSHOT_COMPRESSION[compression], 0, journal_seq, offset)
+    return b''.join([header, *blocks, *index])
+
+def _decompress(payload, compression):
+    if compression == SNAPSHOT_COMPRESSION['zlib']:
+        return memoryview(zlib.decompress(payload))
+    if compression == SNAPSHOT_COMPRESSION['lzma']:
+        return memoryview(lzma.decompress(payload))
+    return memoryview(payload)
+
+class DayBucketReader:
+    """
+    Random access to a version 2 day bucket file held in any buffer (bytes or an mmap).
+    
+    Only the header and channel index are read up front; read_channel() decompresses one
+    channel block at a time.
+    
+    Args:
+        buffer: Day bucket file bytes
+        mapping: Optional mmap backing the buffer, closed together with the reader
+    """
+    
+    def __init__(self, buffer, mapping=None):
+        self._mapping = mapping
+        self._view = memoryview(buffer)
+        try:
+            self._read_index()
+        except Exception:
+            self.close()
+            raise
+    
+    def _read_index(self):
+        view = self._view
+        if len(view) < DAYS_HEADER.size:
+            raise ValueError("Day bucket file is truncated")
+        magic, version, self.compression, _, self.journal_seq, index_offset = DAYS_HEADER.unpack_from(view)
+        if magic != DAYS_MAGIC:
+            raise ValueError("Not a day bucket file")
+        if version != DAYS_VERSION:
+            raise ValueError(f"Unsupported day bucket file version {version}")
+        channels, offset = _unpack_array(view, index_offset, 'Q')
+        offsets, offset = _unpack_array(view, offset, 'Q')
+        lengths, offset = _unpack_array(view, offset, 'Q')
+        if not len(channels) == len(offsets) == len(lengths):
+            raise ValueError("Day bucket index is corrupt")
+        self.blocks = {channel: (offsets[i], lengths[i]) for i, channel in enumerate(channels)}
+    
+    def read_channel(self, channel):
+        """Decode one channel's buckets: {day: (messages, given, received) dicts}"""
+        location = self.blocks.get(channel)
+        if location is None:
+            return {}
+        offset, length = location
+        if offset + length > len(self._view):
+            raise ValueError("Day bucket block is truncated")
+        payload = _decompress(self._view[offset:offset + length], self.compression)
+        
+        offset = 0
+        columns = []
+        for typecode in DAYS_ARRAY_TYPES:
+            values, offset = _unpack_array(payload, offset, typecode)
+            columns.append(values)
+        
+        channel_days = {}
+        for day, index, user, count in zip(*columns):
+            bucket = channel_days.get(day)
+            if bucket is None:
+                bucket = channel_days[day] = ({}, {}, {})
+            bucket[index][str(user)] = count
+        return channel_days
+    
+    def close(self):
+        """Release the buffer (and unmap the file)"""
+        self._view.release()
+        if self._mapping is not None:
+            self._mapping.close()
+            self._mapping = None
+
+def decode_day_buckets_v1(blob):
+    """Decode a version 1 day bucket file completely; returns DayBuckets with .seq set"""
+    magic, version, compression, _, journal_seq = DAYS_HEADER_V1.unpack_from(blob, 0)
+    payload = _decompress(blob[DAYS_HEADER_V1.size:], compression)
+    
+    offset = 0
+    columns = []
+    for typecode in DAYS_ARRAY_TYPES_V1:
+        values, offset = _unpack_array(payload, offset, typecode)
+        columns.append(values)
+    
+    days = DayBuckets()
+    days.seq = journal_seq
+    for channel, day, index, user, count in zip(*columns):
+        channel_days = days.channels.setdefault(str(channel), {})
+        bucket = channel_days.get(day)
+        if bucket is None:
+            bucket = channel_days[day] = ({}, {}, {})
+        bucket[index][str(user)] = count
+    return days
+
+@perf.timed('storage.save_day_buckets')
+def save_day_buckets(days, journal_seq=0, compression='zlib'):
+    """Save day buckets (temp file plus atomic swap); returns True if the file was written"""
+    try:
+        blob = encode_day_buckets(days, journal_seq, compression)
+        temp_file = DAYS_FILE + '.tmp'
+        with open(temp_file, 'wb') as f:
+            f.write(blob)
+        os.replace(temp_file, DAYS_FILE)
+        return True
+    except Exception as e:
+        print(f"❌ Error saving day buckets: {e}")
+        return False
+
+def load_day_buckets():
+    """
+    Open the saved day buckets for lazy loading (only the index is read), or return empty
+    buckets if there are none yet.
+    """
+    if not os.path.exists(DAYS_FILE):
+        return DayBuckets()
+    try:
+        with open(DAYS_FILE, 'rb') as f:
+            magic, version, _, _ = struct.unpack('<4sHBB', f.read(8))
+            if magic != DAYS_MAGIC:
+                raise ValueError("Not a day bucket file")
+            if version == 1:
+                f.seek(0)
+                return decode_day_buckets_v1(f.read())
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        reader = DayBucketReader(mapping, mapping)
+    except (OSError, ValueError, zlib.error, lzma.LZMAError, struct.error) as e:
+        # Records still in the journal are replayed; older per-day history is lost
+        print(f"⚠️  Could not read {DAYS_FILE} ({e}); date-range statistics start over")
+        return DayBuckets()
+    
+    days = DayBuckets(reader)
+    if DEBUG_MODE:
+        print(f"🔍 DEBUG: Opened {DAYS_FILE} ({len(days.unloaded)} channel(s) deferred)")
+    return days
+
+def benchmark_memory_layouts(users=50000, channels=200, channels_per_user=8, emojis_per_entry=3, seed=1):
+    """
+    Compare the memory of the nested-defaultdict layout with CompactCounterStore.
+    
+    Builds a synthetic dataset where each user is active in a few of the channels,
+    measures both layouts with tracemalloc, and checks the conversion round-trips.
+    
+    Returns:
+        dict: Bytes used by each layout plus the dataset shape
+    """
+    import gc
+    import random
+    import tracemalloc
+    
+    rng = random.Random(seed)
+    user_ids = [str(rng.randrange(10 ** 17, 10 ** 19)) for _ in range(users)]
+    channel_ids = [str(rng.randrange(10 ** 17, 10 ** 19)) for _ in range(channels)]
+    emoji_pool = [chr(0x1F600 + i) for i in range(60)] + [f"<:custom{i}:{10 ** 18 + i}>" for i in range(20)]
+    
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    
+    data = {
+        'messages': defaultdict(lambda: defaultdict(int)),
+        'reactions_given': defaultdict(lambda: defaultdict(lambda: defaultdict(int))),
+        'reactions_received': defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+    }
+    for user_id in user_ids:
+        for channel_id in rng.sample(channel_ids, channels_per_user):
+            data['messages'][user_id][channel_id] += rng.randint(1, 500)
+            for category in ('reactions_given', 'reactions_received'):
+                for emoji in rng.sample(emoji_pool, emojis_per_entry):
+                    data[category][user_id][channel_id][emoji] += rng.randint(1, 50)
+    
+    gc.collect()
+    dict_bytes = tracemalloc.get_traced_memory()[0] - before
+    
+    before = tracemalloc.get_traced_memory()[0]
+    store = CompactCounterStore.from_json_data(data)
+    gc.collect()
+    compact_bytes = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    
+    if store.to_json_data() != snapshot_copy(data):
+        raise AssertionError("CompactCounterStore did not round-trip the synthetic dataset")
+    
+    return {
+        'users': users,
+        'channels': channels,
+        'message_counters': users * channels_per_user,
+        'reaction_counters': users * channels_per_user * emojis_per_entry * 2,
+        'dict_bytes': dict_bytes,
+        'compact_bytes': compact_bytes
+    }
+
+class ChannelUserCounters:
+    """One user's counters in one channel, as seen from the channel-major index
+    
+    The emoji dicts are the same objects stored in the user-major data, so reaction
+    updates show up here without extra bookkeeping. None means the user has no entry
+    for that category in the channel.
+    """
+    
+    __slots__ = ('messages', 'reactions_given', 'reactions_received')
+    
+    def __init__(self):
+        self.messages = None
+        self.reactions_given = None
+        self.reactions_received = None
+
+class ChannelTotals:
+    """Running per-channel totals, so channel statistics never walk the per-user counters"""
+    
+    __slots__ = ('messages', 'reactions_given', 'reactions_received')
+    
+    def __init__(self):
+        self.messages = 0
+        self.reactions_given = 0
+        self.reactions_received = 0
+
+class RankedCounter:
+    """
+    Users kept in score order, updated in O(1) per +1/-1 step.
+    
+    Users with equal scores sit in one contiguous run of `order` (highest score first).
+    A +1 swaps the user with the first user of its run and shifts the run boundary by
+    one; a -1 does the same with the last user of the run. The order therefore never
+    needs re-sorting and a top-N leaderboard is just a slice.
+    """
+    
+    __slots__ = ('order', 'position', 'scores', 'run_start', 'run_size')
+    
+    def __init__(self, scores=None):
+        self.order = []  # user_ids, highest score first
+        self.position = {}  # user_id -> index in order
+        self.scores = {}  # user_id -> score
+        self.run_start = {}  # score -> index of the first user with that score
+        self.run_size = {}  # score -> number of users with that score
+        
+        if scores:
+            for index, (user_id, score) in enumerate(sorted(scores.items(), key=lambda x: x[1], reverse=True)):
+                self.order.append(user_id)
+                self.position[user_id] = index
+                self.scores[user_id] = score
+                if score not in self.run_size:
+                    self.run_start[score] = index
+                    self.run_size[score] = 0
+                self.run_size[score] += 1
+    
+    def __len__(self):
+        return len(self.order)
+    
+    def _swap(self, i, j):
+        if i != j:
+            a, b = self.order[i], self.order[j]
+            self.order[i], self.order[j] = b, a
+            self.position[a], self.position[b] = j, i
+    
+    def _leave_run(self, score, start):
+        self.run_size[score] -= 1
+        if self.run_size[score] == 0:
+            del self.run_size[score]
+            del self.run_start[score]
+        else:
+            self.run_start[score] = start
+    
+    def _join_run(self, score, index):
+        if score in self.run_size:
+            self.run_size[score] += 1
+            self.run_start[score] = min(self.run_start[score], index)
+        else:
+            self.run_size[score] = 1
+            self.run_start[score] = index
+    
+    def add(self, user_id, delta):
+        """Change a user's score by delta (users start at 0 and are kept once added)"""
+        if user_id not in self.scores:
+            # Zero is the lowest possible score, so new users go at the end
+            self.position[user_id] = len(self.order)
+            self.order.append(user_id)
+            self.scores[user_id] = 0
+            self._join_run(0, len(self.order) - 1)
+        
+        for _ in range(abs(delta)):
+            score = self.scores[user_id]
+            if delta > 0:
+                # Move to the front of this run, then become the last user of the run above
+                front = self.run_start[score]
+                self._swap(self.position[user_id], front)
+                self._leave_run(score, front + 1)
+                self._join_run(score + 1, front)
+                self.scores[user_id] = score + 1
+            elif score > 0:
+                # Move to the back of this run, then become the first user of the run below
+                back = self.run_start[score] + self.run_size[score] - 1
+                self._swap(self.position[user_id], back)
+                self._leave_run(score, self.run_start[score])
+                self._join_run(score - 1, back)
+                self.scores[user_id] = score - 1
+    
+    def top(self, limit):
+        """The highest-scoring users as (user_id, score) pairs"""
+        return [(user_id, self.scores[user_id]) for user_id in self.order[:limit]]
+
+class StorageBackend:
+    """
+    Base class for analytics storage backends.
+    
+    Handles the write-behind loop every backend shares: counter changes are buffered in
+    memory and a background task flushes them at most once per interval, or sooner once
+    enough records pile up. Subclasses decide how records are persisted and answer the
+    per-channel queries used by the commands.
+    
+    Args:
+        interval: Seconds between flushes while records are pending
+        max_dirty_events: Flush early once this many records are pending
+    """
+    
+    name = 'base'
+    
+    def __init__(self, interval=5.0, max_dirty_events=100):
+        self.interval = interval
+        self.max_dirty_events = max_dirty_events
+        self.pending = []  # Records not yet persisted
+        self.flush_hooks = []  # Other saves run on the same schedule: after each background flush and on shutdown
+        self._wakeup = None
+        self._task = None
+        self._stopping = False
+    
+    @property
+    def dirty(self):
+        return bool(self.pending)
+    
+    def _queued(self):
+        """Wake the flusher early once enough records are pending"""
+        if self._wakeup is not None and len(self.pending) >= self.max_dirty_events:
+            self._wakeup.set()
+    
+    def load(self):
+        """Load persisted data so the backend can serve events and queries"""
+        raise NotImplementedError
+    
+    def record(self, kind, user_id, channel_id, delta=1, emoji=None, day=None):
+        """Apply one counter change and queue it for the next flush (day: UTC day ordinal, if known)"""
+        raise NotImplementedError
+    
+    def flush(self):
+        """Persist pending records; returns True if anything was written"""
+        raise NotImplementedError
+    
+    def clear(self):
+        """Delete all analytics data"""
+        raise NotImplementedError
+    
+    def maintenance(self):
+        """Periodic work run by the background task after each flush"""
+    
+    async def close(self):
+        """Persist everything and release resources on shutdown"""
+        self.flush()
+    
+    # Queries used by the commands
+    
+    def has_reaction_data(self, channel_id):
+        """True if any reaction counters exist for the channel"""
+        raise NotImplementedError
+    
+    def channel_scores(self, channel_id):
+        """Per-user scores for a channel: {category: {user_id: score}}"""
+        raise NotImplementedError
+    
+    def channel_totals(self, channel_id):
+        """Channel totals: {'messages', 'reactions_given', 'reactions_received', 'active_users'}"""
+        raise NotImplementedError
+    
+    def channel_leaderboard(self, channel_id, limit):
+        """Top users per category, highest first: {category: [(user_id, score), ...]}"""
+        raise NotImplementedError
+    
+    def user_channel_stats(self, user_id, channel_id):
+        """A user's counters in a channel: (message_count, {emoji: given}, {emoji: received})"""
+        raise NotImplementedError
+    
+    def export_data(self):
+        """All counters in the JSON file layout (user_id -> channel_id -> ...)"""
+        raise NotImplementedError
+    
+    def range_scores(self, channel_id, start_day, end_day):
+        """Per-user scores over UTC days start_day..end_day (inclusive): {category: {user_id: score}}"""
+        raise NotImplementedError
+    
+    def range_totals(self, channel_id, start_day, end_day):
+        """channel_totals() restricted to a day range"""
+        scores = self.range_scores(channel_id, start_day, end_day)
+        totals = {category: sum(category_scores.values()) for category, category_scores in scores.items()}
+        totals['active_users'] = len(set().union(*scores.values()))
+        return totals
+    
+    def range_leaderboard(self, channel_id, start_day, end_day, limit):
+        """channel_leaderboard() restricted to a day range"""
+        return {
+            category: heapq.nlargest(limit, category_scores.items(), key=lambda x: x[1])
+            for category, category_scores in self.range_scores(channel_id, start_day, end_day).items()
+        }
+    
+    def start(self):
+        """Start the background flush task (must be called from the running event loop)"""
+        if self._task is None:
+            self._stopping = False
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+    
+    async def stop(self):
+        """Stop the background task and persist anything still pending"""
+        if self._task is not None:
+            # Not cancelled: wait_for() can swallow a cancel that lands as the event is set
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.close()
+        for hook in self.flush_hooks:
+            hook()
+    
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._stopping:
+                return  # stop() does the final flush through close()
+            self._wakeup.clear()
+            if self.pending:
+                records = len(self.pending)
+                with perf.timer('storage.flush'):
+                    written = self.flush()
+                if written:
+                    perf.count('storage.records_flushed', records)
+                else:
+                    perf.count('storage.flush_failures')
+            self.maintenance()
+            for hook in self.flush_hooks:
+                hook()
+
+class JsonStorageBackend(StorageBackend):
+    """
+    In-memory analytics data persisted as a JSON snapshot plus an append-only event journal.
+    
+    Every counter change becomes one compact journal record. Flushes append the buffered
+    records to the journal file, and a periodic compaction folds the journal into a new
+    JSON snapshot. On startup the journal is replayed on top of the last snapshot, so a
+    crash loses at most the records that were still buffered.
+    
+    Compaction takes a plain-dict copy of the data on the event loop and serializes it in a
+    worker thread, so event handlers never wait on the encoder. Only one snapshot is written
+    at a time; requests made meanwhile coalesce into a single follow-up snapshot.
+    
+    With the binary snapshot format the JSON file is only refreshed as a human-readable
+    export every json_export_interval seconds and on shutdown. The binary snapshot is
+    memory-mapped and loaded lazily: only its index is read at startup, a channel is decoded
+    the first time an event or query touches it, and a background task warms the rest.
+    
+    Per-day counters for date-range queries are kept in DayBuckets, loaded per channel the
+    same lazy way, and written to DAYS_FILE by the same compaction.
+    
+    Args:
+        compact_interval: Seconds between snapshot compactions while the journal is non-empty
+        compact_max_events: Compact early once the journal holds this many records
+        snapshot_format: 'binary' (compact snapshot plus periodic JSON export) or 'json'
+        compression: Binary snapshot compression: none, zlib or lzma
+        json_export_interval: Seconds between JSON exports in binary mode
+    """
+    
+    name = 'json'
+    
+    def __init__(self, interval=5.0, max_dirty_events=100, compact_interval=300.0, compact_max_events=5000,
+                 snapshot_format='binary', compression='zlib', json_export_interval=600.0):
+        super().__init__(interval, max_dirty_events)
+        self.compact_interval = compact_interval
+        self.compact_max_events = compact_max_events
+        self.snapshot_format = snapshot_format
+        self.compression = compression
+        self.json_export_interval = json_export_interval
+        self._last_json_export = time.monotonic()
+        self._json_export_seq = None  # Journal sequence the JSON export covers (unknown until written)
+        self._closing = False
+        self._snapshot = None  # SnapshotReader while channels are still unloaded
+        self._unloaded = set()  # Channel IDs in the snapshot that are not materialized yet
+        self._warmer = None
+        self.data = None
+        self.days = DayBuckets()  # Per-day counters for date-range queries (saved to DAYS_FILE)
+        self.channels = {}  # channel_id -> user_id -> ChannelUserCounters
+        self.totals = {}  # channel_id -> ChannelTotals
+        self.rankings = {}  # channel_id -> category -> RankedCounter
+        self.seq = 0  # Sequence number of the last recorded event
+        self.journal_events = 0  # Records in the journal files since the last snapshot
+        self._last_compact = time.monotonic()
+        self._compaction = None  # Snapshot task in flight
+        self._compact_again = False
+    
+    def load(self):
+        """Load the last snapshot and replay the journal on top of it"""
+        started = time.perf_counter()
+        snapshot_seq = self._open_snapshot()
+        if snapshot_seq is None:
+            self.data, snapshot_seq = load_snapshot(self.snapshot_format)
+        
+        # Channels touched by the journal are materialized before their records are applied
+        self.days = load_day_buckets()
+        self.seq, self.journal_events = replay_journal(self.data, snapshot_seq, self._materialize_data, self.days)
+        self.seq = max(self.seq, self.days.seq)  # New records must sort after everything the bucket file covers
+        self.rebuild_index()
+        
+        if self._snapshot is not None or self.days.unloaded:
+            snapshot_channels = len(self._snapshot.blocks) if self._snapshot is not None else 0
+            print(f"📂 Snapshot opened in {(time.perf_counter() - started) * 1000:.1f} ms "
+                  f"({len(self._unloaded)} of {snapshot_channels} channels and "
+                  f"{len(self.days.unloaded)} channels of day buckets deferred)", flush=True)
+        return self.data
+    
+    def _open_snapshot(self):
+        """Map the binary snapshot for lazy loading; returns its journal_seq, or None to load eagerly"""
+        if self.snapshot_format != 'binary' or not os.path.exists(SNAPSHOT_FILE):
+            return None
+        try:
+            self._snapshot = open_snapshot()
+        except (OSError, ValueError, zlib.error, lzma.LZMAError, struct.error) as e:
+            print(f"⚠️  Could not read {SNAPSHOT_FILE} ({e}); falling back to {DATA_FILE}")
+            return None
+        
+        self.data = to_defaultdicts({})
+        self._unloaded = {str(channel) for channel in self._snapshot.blocks}
+        return self._snapshot.journal_seq
+    
+    def _materialize_data(self, channel_id):
+        """Decode one channel from the snapshot into the user-major data; returns its users per category"""
+        if channel_id not in self._unloaded:
+            return None
+        self._unloaded.discard(channel_id)
+        
+        table = self._snapshot.read_channel(int(channel_id))
+        emojis = self._snapshot.emojis
+        users = {}
+        users['messages'] = [str(user) for user in table.message_users]
+        for user_id, count in zip(users['messages'], table.message_counts):
+            self.data['messages'][user_id][channel_id] = count
+        for category in ('reactions_given', 'reactions_received'):
+            category_users = users[category] = []
+            for user, emoji_id, count in zip(*table.reaction_arrays(category)):
+                user_id = str(user)
+                if not category_users or category_users[-1] != user_id:  # Rows are sorted by user
+                    category_users.append(user_id)
+                channel_emojis = self.data[category][user_id][channel_id]
+                if emoji_id:
+                    channel_emojis[emojis[emoji_id]] = count
+        
+        if not self._unloaded:
+            self._release_snapshot()
+        return users
+    
+    def _materialize(self, channel_id):
+        """Make sure a channel is loaded and indexed before it is read or changed"""
+        if channel_id not in self._unloaded:
+            return
+        users = self._materialize_data(channel_id)
+        
+        totals = self._channel_totals(channel_id)
+        for category, category_users in users.items():
+            category_data = self.data[category]
+            total = 0
+            for user_id in category_users:
+                value = category_data[user_id][channel_id]
+                setattr(self._channel_entry(channel_id, user_id), category, value)
+                total += value if category == 'messages' else sum(value.values())
+            setattr(totals, category, getattr(totals, category) + total)
+        self._rank_channel(channel_id)
+    
+    def materialize_all(self):
+        """Load every channel still deferred in the snapshot"""
+        while self._unloaded:
+            self._materialize(next(iter(self._unloaded)))
+    
+    def _release_snapshot(self):
+        if self._snapshot is not None:
+            self._snapshot.close()
+            self._snapshot = None
+        self._unloaded = set()
+    
+    async def _warm(self):
+        """Materialize deferred channels (and their day buckets) one at a time so the event loop stays responsive"""
+        started = time.perf_counter()
+        while self._unloaded:
+            self._materialize(next(iter(self._unloaded)))
+            await asyncio.sleep(0)
+        while self.days.unloaded:
+            self.days.load_channel(next(iter(self.days.unloaded)))
+            await asyncio.sleep(0)
+        print(f"🔥 Snapshot fully loaded in {time.perf_counter() - started:.2f}s", flush=True)
+    
+    def start(self):
+        super().start()
+        if (self._unloaded or self.days.unloaded) and self._warmer is None:
+            self._warmer = asyncio.create_task(self._warm())
+    
+    def rebuild_index(self):
+        """Rebuild the channel-major index and running channel totals from the user-major data"""
+        self.channels = {}
+        self.totals = {}
+        for category in ('messages', 'reactions_given', 'reactions_received'):
+            for user_id, channels in self.data[category].items():
+                for channel_id, value in channels.items():
+                    setattr(self._channel_entry(channel_id, user_id), category, value)
+                    total = value if category == 'messages' else sum(value.values())
+                    totals = self._channel_totals(channel_id)
+                    setattr(totals, category, getattr(totals, category) + total)
+        
+        # Leaderboards are sorted once here and then maintained incrementally
+        self.rankings = {}
+        for channel_id in self.channels:
+            self._rank_channel(channel_id)
+    
+    def _rank_channel(self, channel_id):
+        scores = self.channel_scores(channel_id)
+        self.rankings[channel_id] = {
+            category: RankedCounter(category_scores) for category, category_scores in scores.items()
+        }
+    
+    def _ranking(self, channel_id, category):
+        rankings = self.rankings.get(channel_id)
+        if rankings is None:
+            rankings = self.rankings[channel_id] = {
+                'messages': RankedCounter(),
+                'reactions_given': RankedCounter(),
+                'reactions_received': RankedCounter()
+            }
+        return rankings[category]
+    
+    def _channel_totals(self, channel_id):
+        totals = self.totals.get(channel_id)
+        if totals is None:
+            totals = self.totals[channel_id] = ChannelTotals()
+        return totals
+    
+    def _channel_entry(self, channel_id, user_id):
+        users = self.channels.get(channel_id)
+        if users is None:
+            users = self.channels[channel_id] = {}
+        entry = users.get(user_id)
+        if entry is None:
+            entry = users[user_id] = ChannelUserCounters()
+        return entry
+    
+    def _index_event(self, kind, user_id, channel_id, applied):
+        """Mirror a user-major change into the channel-major index, totals and leaderboards"""
+        if kind == EVENT_MESSAGE:
+            self._channel_entry(channel_id, user_id).messages = self.data['messages'][user_id][channel_id]
+            self._channel_totals(channel_id).messages += applied
+            self._ranking(channel_id, 'messages').add(user_id, applied)
+            return
+        
+        category = 'reactions_given' if kind == EVENT_REACTION_GIVEN else 'reactions_received'
+        emojis = self.data[category].get(user_id, {}).get(channel_id)
+        if emojis is None:  # Removals of unknown counters leave no entry behind
+            return
+        setattr(self._channel_entry(channel_id, user_id), category, emojis)
+        totals = self._channel_totals(channel_id)
+        setattr(totals, category, getattr(totals, category) + applied)
+        self._ranking(channel_id, category).add(user_id, applied)
+    
+    def record(self, kind, user_id, channel_id, delta=1, emoji=None, day=None):
+        self._materialize(channel_id)
+        applied = apply_event(self.data, kind, user_id, channel_id, delta, emoji)
+        self._index_event(kind, user_id, channel_id, applied)
+        if day is not None:
+            self.days.add(kind, user_id, channel_id, day, delta)
+        
+        self.seq += 1
+        journal_record = [self.seq, kind, user_id, channel_id, delta]
+        if emoji is not None or day is not None:
+            journal_record.append(emoji)
+        if day is not None:
+            journal_record.append(day)
+        self.pending.append(json.dumps(journal_record, ensure_ascii=False, separators=(',', ':')))
+        self._queued()
+    
+    def flush(self):
+        """Append pending journal records to disk"""
+        if not self.pending:
+            return False
+        
+        if DEBUG_MODE:
+            print(f"🔍 DEBUG: Flushing {len(self.pending)} journal record(s)")
+        
+        lines, self.pending = self.pending, []
+        try:
+            with open(JOURNAL_FILE, 'a', encoding='utf-8') as f:
+                f.write('\n'.join(lines) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            # Keep the records so the next flush retries them
+            self.pending = lines + self.pending
+            print(f"❌ Error writing analytics journal: {e}")
+            return False
+        
+        self.journal_events += len(lines)
+        return True
+    
+    def _rotate_journal(self):
+        """Move the journal aside so records written during the snapshot land in a fresh file"""
+        if not os.path.exists(JOURNAL_FILE):
+            return
+        
+        if not os.path.exists(ROTATED_JOURNAL_FILE):
+            os.replace(JOURNAL_FILE, ROTATED_JOURNAL_FILE)
+            return
+        
+        # A previous snapshot failed and its rotated journal is still needed; extend it
+        with open(JOURNAL_FILE, 'r', encoding='utf-8') as src, open(ROTATED_JOURNAL_FILE, 'a', encoding='utf-8') as dst:
+            shutil.copyfileobj(src, dst)
+        open(JOURNAL_FILE, 'w', encoding='utf-8').close()
+    
+    async def _compact_once(self):
+        # Everything up to self.seq goes into the snapshot; later records go to the fresh journal
+        self.flush()
+        if self.pending:
+            return False  # The journal is not writable right now; try again next time
+        
+        try:
+            self._rotate_journal()
+        except OSError as e:
+            print(f"❌ Error rotating analytics journal: {e}")
+            return False
+        
+        # The snapshot and bucket files are about to be replaced, so finish loading them first
+        self.materialize_all()
+        self.days.load_all()
+        
+        snapshot_seq = self.seq
+        self.journal_events = 0
+        self._last_compact = time.monotonic()
+        data = snapshot_copy(self.data)
+        days = self.days.copy()
+        
+        export_json = self._closing or time.monotonic() - self._last_json_export >= self.json_export_interval
+        if export_json:
+            self._last_json_export = time.monotonic()
+            self._json_export_seq = snapshot_seq
+        
+        with perf.timer('storage.snapshot'):
+            written = await asyncio.to_thread(self._write_snapshot, data, days, snapshot_seq, export_json)
+        if not written:
+            # The rotated journal stays on disk and is replayed (or extended) later
+            return False
+        
+        try:
+            os.remove(ROTATED_JOURNAL_FILE)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            # Harmless: replay skips records the snapshot already covers
+            print(f"⚠️  Could not remove rotated analytics journal: {e}")
+        return True
+    
+    def _write_snapshot(self, data, days, snapshot_seq, export_json):
+        """Worker-thread half of compaction; returns True once the snapshot is durable"""
+        # Written first: replay skips dated records the bucket file covers, whatever the snapshot holds
+        if not save_day_buckets(days, snapshot_seq, self.compression):
+            return False
+        
+        if self.snapshot_format == 'json':
+            if not save_data(data, snapshot_seq):
+                return False
+            # A leftover binary snapshot would be stale if the format is switched back later
+            try:
+                os.remove(SNAPSHOT_FILE)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"⚠️  Could not remove stale binary snapshot: {e}")
+            return True
+        
+        if not save_binary_snapshot(data, snapshot_seq, self.compression):
+            return False
+        if export_json:
+            save_data(data, snapshot_seq)  # Export only; the binary snapshot is authoritative
+        return True
+    
+    async def _compaction_loop(self):
+        while True:
+            self._compact_again = False
+            await self._compact_once()
+            if not self._compact_again:
+                return
+    
+    def request_compaction(self):
+        """Start a snapshot, or coalesce into a follow-up if one is already being written"""
+        if self._compaction is not None and not self._compaction.done():
+            self._compact_again = True
+        else:
+            self._compaction = asyncio.create_task(self._compaction_loop())
+        return self._compaction
+    
+    async def compact(self):
+        """Fold everything recorded so far into a new snapshot and wait for it to be written"""
+        await self.request_compaction()
+    
+    def maintenance(self):
+        if self.journal_events >= self.compact_max_events:
+            self.request_compaction()
+        elif self.journal_events > 0 and time.monotonic() - self._last_compact >= self.compact_interval:
+            self.request_compaction()
+    
+    def clear(self):
+        self.data['messages'] = defaultdict(lambda: defaultdict(int))
+        self.data['reactions_given'] = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+        self.data['reactions_received'] = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+        self.days.close()
+        self.days = DayBuckets()
+        self.channels = {}
+        self.totals = {}
+        self.rankings = {}
+        self._release_snapshot()
+        
+        # Save the cleared data as a new snapshot (this also retires the journal)
+        self.request_compaction()
+    
+    async def close(self):
+        """Flush the journal and leave a fresh snapshot (and JSON export) for the next start"""
+        self.flush()
+        self._closing = True
+        if self._warmer is not None:
+            self._warmer.cancel()
+            self._warmer = None
+        if self.journal_events or (self._compaction is not None and not self._compaction.done()) or \
+           (self.snapshot_format == 'binary' and self._json_export_seq != self.seq):
+            await self.compact()
+    
+    def has_reaction_data(self, channel_id):
+        self._materialize(channel_id)
+        for entry in self.channels.get(channel_id, {}).values():
+            if (entry.reactions_given and any(entry.reactions_given.values())) or \
+               (entry.reactions_received and any(entry.reactions_received.values())):
+                return True
+        return False
+    
+    def channel_scores(self, channel_id):
+        scores = {
+            'messages': {},
+            'reactions_given': {},
+            'reactions_received': {}
+        }
+        
+        self._materialize(channel_id)
+        
+        # Only users active in this channel are visited
+        for user_id, entry in self.channels.get(channel_id, {}).items():
+            if entry.messages is not None:
+                scores['messages'][user_id] = entry.messages
+            if entry.reactions_given is not None:
+                scores['reactions_given'][user_id] = sum(entry.reactions_given.values())
+            if entry.reactions_received is not None:
+                scores['reactions_received'][user_id] = sum(entry.reactions_received.values())
+        
+        return scores
+    
+    def channel_totals(self, channel_id):
+        self._materialize(channel_id)
+        totals = self.totals.get(channel_id) or ChannelTotals()
+        return {
+            'messages': totals.messages,
+            'reactions_given': totals.reactions_given,
+            'reactions_received': totals.reactions_received,
+            'active_users': len(self.channels.get(channel_id, {}))
+        }
+    
+    def channel_leaderboard(self, channel_id, limit):
+        self._materialize(channel_id)
+        rankings = self.rankings.get(channel_id, {})
+        return {
+            category: rankings[category].top(limit) if category in rankings else []
+            for category in ('messages', 'reactions_given', 'reactions_received')
+        }
+    
+    def user_channel_stats(self, user_id, channel_id):
+        self._materialize(channel_id)
+        return (
+            self.data['messages'].get(user_id, {}).get(channel_id, 0),
+            dict(self.data['reactions_given'].get(user_id, {}).get(channel_id, {})),
+            dict(self.data['reactions_received'].get(user_id, {}).get(channel_id, {}))
+        )
+    
+    def export_data(self):
+        self.materialize_all()
+        return self.data
+    
+    def range_scores(self, channel_id, start_day, end_day):
+        return self.days.range_scores(channel_id, start_day, end_day)
+    
+    def range_totals(self, channel_id, start_day, end_day):
+        totals = self.days.range_totals(channel_id, start_day, end_day)
+        scores = self.range_scores(channel_id, start_day, end_day)
+        totals['active_users'] = len(set().union(*scores.values()))
+        return totals
+
+class SqliteStorageBackend(StorageBackend):
+    """
+    Analytics counters stored in normalized SQLite tables.
+    
+    Only the tables live on disk; nothing is materialized in memory at startup. Pending
+    records are written as incremental UPSERTs, one transaction per flush, and the
+    commands run as indexed per-channel queries. Queries add the records still pending
+    on top of what is stored, so a command never writes to the database on the event
+    loop. On first use the existing JSON snapshot (plus journal) is imported.
+    
+    Per-day counters live in day_counts and date ranges are answered by an indexed range scan.
+    
+    Args:
+        path: SQLite database file
+    """
+    
+    name = 'sqlite'
+    
+    REACTION_TABLES = {
+        EVENT_REACTION_GIVEN: 'reactions_given',
+        EVENT_REACTION_RECEIVED: 'reactions_received'
+    }
+    
+    def __init__(self, path, interval=5.0, max_dirty_events=100):
+        super().__init__(interval, max_dirty_events)
+        self.path = path
+        self.conn = None
+    
+    def load(self):
+        is_new = not os.path.exists(self.path)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.executescript("""
+                CREATE TABLE IF NOT EXISTS messages (
+                    user_id TEXT NOT NULL,
+                    channel_id TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (user_id, channel_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_messages_channel ON messages (channel_id, user_id);
+                CREATE INDEX IF NOT EXISTS idx_messages_channel_rank ON messages (channel_id, count DESC);
+                
+                CREATE TABLE IF NOT EXISTS reactions_given (
+                    user_id TEXT NOT NULL,
+                    channel_id TEXT NOT NULL,
+                    emoji TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (user_id, channel_id, emoji)
+                );
+                CREATE INDEX IF NOT EXISTS idx_reactions_given_channel ON reactions_given (channel_id, user_id);
+                
+                CREATE TABLE IF NOT EXISTS reactions_received (
+                    user_id TEXT NOT NULL,
+                    channel_id TEXT NOT NULL,
+                    emoji TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (user_id, channel_id, emoji)
+                );
+                CREATE INDEX IF NOT EXISTS idx_reactions_received_channel ON reactions_received (channel_id, user_id);
+                
+                CREATE TABLE IF NOT EXISTS channel_totals (
+                    channel_id TEXT PRIMARY KEY,
+                    messages INTEGER NOT NULL DEFAULT 0,
+                    reactions_given INTEGER NOT NULL DEFAULT 0,
+                    reactions_received INTEGER NOT NULL DEFAULT 0,
+                    active_users INTEGER NOT NULL DEFAULT 0
+                );
+                
+                CREATE TABLE IF NOT EXISTS channel_members (
+                    channel_id TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    PRIMARY KEY (channel_id, user_id)
+                );
+                
+                CREATE TRIGGER IF NOT EXISTS channel_members_insert AFTER INSERT ON channel_members BEGIN
+                    UPDATE channel_totals SET active_users = active_users + 1 WHERE channel_id = NEW.channel_id;
+                END;
+                
+                CREATE TABLE IF NOT EXISTS channel_user_reactions (
+                    channel_id TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    reactions_given INTEGER NOT NULL DEFAULT 0,
+                    reactions_received INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (channel_id, user_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_channel_user_reactions_given ON channel_user_reactions (channel_id, reactions_given DESC);
+                CREATE INDEX IF NOT EXISTS idx_channel_user_reactions_received ON channel_user_reactions (channel_id, reactions_received DESC);
+                
+                CREATE TABLE IF NOT EXISTS day_counts (
+                    channel_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    day INTEGER NOT NULL,
+                    user_id TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    PRIMARY KEY (channel_id, kind, day, user_id)
+                ) WITHOUT ROWID;
+            """)
+            
+            # Reaction tables keep per-user reaction totals current for the leaderboards
+            for table in self.REACTION_TABLES.values():
+                self.conn.executescript(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_rank_insert AFTER INSERT ON {table} BEGIN
+                        INSERT OR IGNORE INTO channel_user_reactions (channel_id, user_id) VALUES (NEW.channel_id, NEW.user_id);
+                        UPDATE channel_user_reactions SET {table} = {table} + NEW.count
+                            WHERE channel_id = NEW.channel_id AND user_id = NEW.user_id;
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS {table}_rank_update AFTER UPDATE OF count ON {table} BEGIN
+                        UPDATE channel_user_reactions SET {table} = {table} + NEW.count - OLD.count
+                            WHERE channel_id = NEW.channel_id AND user_id = NEW.user_id;
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS {table}_rank_delete AFTER DELETE ON {table} BEGIN
+                        UPDATE channel_user_reactions SET {table} = {table} - OLD.count
+                            WHERE channel_id = OLD.channel_id AND user_id = OLD.user_id;
+                    END;
+                """)
+            
+            # Counter tables keep channel_totals current inside the same transaction
+            for table in ('messages', *self.REACTION_TABLES.values()):
+                self.conn.executescript(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_insert AFTER INSERT ON {table} BEGIN
+                        INSERT OR IGNORE INTO channel_totals (channel_id) VALUES (NEW.channel_id);
+                        UPDATE channel_totals SET {table} = {table} + NEW.count WHERE channel_id = NEW.channel_id;
+                        INSERT OR IGNORE INTO channel_members (channel_id, user_id) VALUES (NEW.channel_id, NEW.user_id);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS {table}_update AFTER UPDATE OF count ON {table} BEGIN
+                        UPDATE channel_totals SET {table} = {table} + NEW.count - OLD.count WHERE channel_id = NEW.channel_id;
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS {table}_delete AFTER DELETE ON {table} BEGIN
+                        UPDATE channel_totals SET {table} = {table} - OLD.count WHERE channel_id = OLD.channel_id;
+                    END;
+                """)
+        
+        if is_new and os.path.exists(DATA_FILE):
+            self._import_json()
+        else:
+            self._backfill_totals()
+    
+    def _table_is_empty(self, table):
+        return not self.conn.execute(f"SELECT EXISTS (SELECT 1 FROM {table})").fetchone()[0]
+    
+    def _backfill_totals(self):
+        """Fill the trigger-maintained tables for databases created before they existed"""
+        if self._table_is_empty('channel_user_reactions'):
+            with self.conn:
+                self.conn.execute("""
+                    INSERT INTO channel_user_reactions (channel_id, user_id, reactions_given, reactions_received)
+                    SELECT channel_id, user_id, SUM(given), SUM(received) FROM (
+                        SELECT channel_id, user_id, count AS given, 0 AS received FROM reactions_given
+                        UNION ALL SELECT channel_id, user_id, 0, count FROM reactions_received
+                    ) GROUP BY channel_id, user_id
+                """)
+        
+        if not self._table_is_empty('channel_totals'):
+            return
+        
+        with self.conn:
+            self.conn.execute("""
+                INSERT OR IGNORE INTO channel_members (channel_id, user_id)
+                SELECT channel_id, user_id FROM messages
+                UNION SELECT channel_id, user_id FROM reactions_given
+                UNION SELECT channel_id, user_id FROM reactions_received
+            """)
+            self.conn.execute("""
+                INSERT INTO channel_totals (channel_id, messages, reactions_given, reactions_received, active_users)
+                SELECT m.channel_id,
+                    (SELECT COALESCE(SUM(count), 0) FROM messages WHERE channel_id = m.channel_id),
+                    (SELECT COALESCE(SUM(count), 0) FROM reactions_given WHERE channel_id = m.channel_id),
+                    (SELECT COALESCE(SUM(count), 0) FROM reactions_received WHERE channel_id = m.channel_id),
+                    COUNT(*)
+                FROM channel_members m GROUP BY m.channel_id
+            """)
+    
+    def _import_json(self):
+        """One-time migration of the snapshot and journal into the database"""
+        data, snapshot_seq = load_snapshot()
+        days = load_day_buckets()
+        days.load_all()
+        replay_journal(data, snapshot_seq, days=days)
+        
+        with self.conn:
+            self.conn.executemany(
+                "INSERT INTO messages (user_id, channel_id, count) VALUES (?, ?, ?)",
+                ((user_id, channel_id, count)
+                 for user_id, channels in data['messages'].items()
+                 for channel_id, count in channels.items() if count > 0)
+            )
+            for table in self.REACTION_TABLES.values():
+                self.conn.executemany(
+                    f"INSERT INTO {table} (user_id, channel_id, emoji, count) VALUES (?, ?, ?, ?)",
+                    ((user_id, channel_id, emoji, count)
+                     for user_id, channels in data[table].items()
+                     for channel_id, emojis in channels.items()
+                     for emoji, count in emojis.items() if count > 0)
+                )
+            self.conn.executemany(
+                "INSERT INTO day_counts (channel_id, kind, day, user_id, count) VALUES (?, ?, ?, ?, ?)",
+                ((channel_id, kind, day, user_id, count)
+                 for channel_id, channel_days in days.channels.items()
+                 for day, bucket in channel_days.items()
+                 for kind, counts in zip(DAY_CATEGORIES, bucket)
+                 for user_id, count in counts.items())
+            )
+        
+        print(f"📦 Imported {DATA_FILE} into {self.path}")
+    
+    def record(self, kind, user_id, channel_id, delta=1, emoji=None, day=None):
+        self.pending.append((kind, user_id, channel_id, delta, emoji, day))
+        self._queued()
+    
+    def _statements(self, records):
+        """Translate records into (sql, params) pairs, grouping runs of the same statement"""
+        batch_sql = None
+        batch_params = []
+        
+        for kind, user_id, channel_id, delta, emoji, day in records:
+            if kind == EVENT_MESSAGE:
+                statements = [(
+                    "INSERT INTO messages (user_id, channel_id, count) VALUES (?, ?, ?) "
+                    "ON CONFLICT (user_id, channel_id) DO UPDATE SET count = count + excluded.count",
+                    (user_id, channel_id, delta)
+                )]
+            elif delta > 0:
+                table = self.REACTION_TABLES[kind]
+                statements = [(
+                    f"INSERT INTO {table} (user_id, channel_id, emoji, count) VALUES (?, ?, ?, ?) "
+                    f"ON CONFLICT (user_id, channel_id, emoji) DO UPDATE SET count = count + excluded.count",
+                    (user_id, channel_id, emoji, delta)
+                )]
+            else:
+                # Removals only decrement counters we know about and stop at zero. The row is kept, so
+                # the user stays ranked in the category like in the JSON backend
+                table = self.REACTION_TABLES[kind]
+                statements = [(
+                    f"UPDATE {table} SET count = MAX(count + ?, 0) WHERE user_id = ? AND channel_id = ? AND emoji = ?",
+                    (delta, user_id, channel_id, emoji)
+                )]
+            
+            if day is not None and delta > 0:
+                statements.append((
+                    "INSERT INTO day_counts (channel_id, kind, day, user_id, count) VALUES (?, ?, ?, ?, ?) "
+                    "ON CONFLICT (channel_id, kind, day, user_id) DO UPDATE SET count = count + excluded.count",
+                    (channel_id, kind, day, user_id, delta)
+                ))
+            elif day is not None:
+                statements += [
+                    ("UPDATE day_counts SET count = count + ? WHERE channel_id = ? AND kind = ? AND day = ? AND user_id = ?",
+                     (delta, channel_id, kind, day, user_id)),
+                    ("DELETE FROM day_counts WHERE channel_id = ? AND kind = ? AND day = ? AND user_id = ? AND count <= 0",
+                     (channel_id, kind, day, user_id))
+                ]
+            
+            for sql, params in statements:
+                if sql != batch_sql and batch_params:
+                    yield batch_sql, batch_params
+                    batch_params = []
+                batch_sql = sql
+                batch_params.append(params)
+        
+        if batch_params:
+            yield batch_sql, batch_params
+    
+    def flush(self):
+        """Write pending records in a single transaction"""
+        if not self.pending:
+            return False
+        
+        if self.conn is None:
+            # Already closed (records arrived during shutdown): write them on a short-lived connection
+            self.conn = sqlite3.connect(self.path)
+            try:
+                return self.flush()
+            finally:
+                self.conn.close()
+                self.conn = None
+        
+        if DEBUG_MODE:
+            print(f"🔍 DEBUG: Writing {len(self.pending)} record(s) to {self.path}")
+        
+        records, self.pending = self.pending, []
+        try:
+            with self.conn:
+                for sql, params in self._statements(records):
+                    self.conn.executemany(sql, params)
+        except sqlite3.Error as e:
+            # The transaction rolled back; keep the records so the next flush retries them
+            self.pending = records + self.pending
+            print(f"❌ Error writing analytics database: {e}")
+            return False
+        
+        return True
+    
+    def clear(self):
+        self.pending = []
+        with self.conn:
+            for table in ('messages', *self.REACTION_TABLES.values(), 'channel_members', 'channel_totals', 'channel_user_reactions', 'day_counts'):
+                self.conn.execute(f"DELETE FROM {table}")
+    
+    async def close(self):
+        self.flush()
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+    
+    def _stored(self, kind, user_id, channel_id, emoji=None, day=None):
+        """A counter's value in the database (0 if it has no row)"""
+        if day is not None:
+            row = self.conn.execute(
+                "SELECT count FROM day_counts WHERE channel_id = ? AND kind = ? AND day = ? AND user_id = ?",
+                (channel_id, kind, day, user_id)
+            ).fetchone()
+        elif kind == EVENT_MESSAGE:
+            row = self.conn.execute(
+                "SELECT count FROM messages WHERE user_id = ? AND channel_id = ?", (user_id, channel_id)
+            ).fetchone()
+        else:
+            row = self.conn.execute(
+                f"SELECT count FROM {self.REACTION_TABLES[kind]} WHERE user_id = ? AND channel_id = ? AND emoji = ?",
+                (user_id, channel_id, emoji)
+            ).fetchone()
+        return row[0] if row else 0
+    
+    def _pending_changes(self, channel_id=None, user_id=None, days=False):
+        """
+        What the pending records will change once flushed, replayed the way flush() applies them.
+        
+        Returns {(kind, user_id, channel_id, emoji): [delta, added]} (the day instead of the emoji
+        with days=True). added means the flush creates the counter's row if it is missing. Removals
+        stop at zero and ignore counters that do not exist, so removed counters are looked up.
+        """
+        changes = {}
+        stored = {}
+        for kind, record_user, record_channel, delta, emoji, day in self.pending:
+            if (channel_id is not None and record_channel != channel_id) or \
+               (user_id is not None and record_user != user_id) or (days and day is None):
+                continue
+            key = (kind, record_user, record_channel, day if days else emoji)
+            change = changes.get(key)
+            if change is None:
+                change = changes[key] = [0, False]
+            if delta > 0:
+                change[0] += delta
+                change[1] = True
+                continue
+            if key not in stored:
+                stored[key] = self._stored(kind, record_user, record_channel, *((None, day) if days else (emoji, None)))
+            change[0] = max(change[0] + delta, -stored[key])
+        return changes
+    
+    def has_reaction_data(self, channel_id):
+        # Pending removals that would empty the channel are ignored; this only decides whether to scan history
+        for (kind, _, _, _), (delta, _) in self._pending_changes(channel_id).items():
+            if kind != EVENT_MESSAGE and delta > 0:
+                return True
+        row = self.conn.execute(
+            "SELECT EXISTS (SELECT 1 FROM reactions_given WHERE channel_id = ? AND count > 0) "
+            "OR EXISTS (SELECT 1 FROM reactions_received WHERE channel_id = ? AND count > 0)",
+            (channel_id, channel_id)
+        ).fetchone()
+        return bool(row[0])
+    
+    def channel_scores(self, channel_id):
+        scores = {
+            'messages': dict(self.conn.execute(
+                "SELECT user_id, count FROM messages WHERE channel_id = ?", (channel_id,)
+            ))
+        }
+        for table in self.REACTION_TABLES.values():
+            scores[table] = dict(self.conn.execute(
+                f"SELECT user_id, SUM(count) FROM {table} WHERE channel_id = ? GROUP BY user_id", (channel_id,)
+            ))
+        for (kind, user_id, _, _), (delta, added) in self._pending_changes(channel_id).items():
+            category = self.REACTION_TABLES.get(kind, 'messages')
+            if added or user_id in scores[category]:
+                scores[category][user_id] = scores[category].get(user_id, 0) + delta
+        return scores
+    
+    def channel_totals(self, channel_id):
+        row = self.conn.execute(
+            "SELECT messages, reactions_given, reactions_received, active_users FROM channel_totals WHERE channel_id = ?",
+            (channel_id,)
+        ).fetchone() or (0, 0, 0, 0)
+        
+        totals = {
+            'messages': row[0],
+            'reactions_given': row[1],
+            'reactions_received': row[2],
+            'active_users': row[3]
+        }
+        
+        new_users = set()
+        for (kind, user_id, _, _), (delta, added) in self._pending_changes(channel_id).items():
+            totals[self.REACTION_TABLES.get(kind, 'messages')] += delta
+            if added:
+                new_users.add(user_id)
+        for user_id in new_users:
+            if not self.conn.execute(
+                "SELECT EXISTS (SELECT 1 FROM channel_members WHERE channel_id = ? AND user_id = ?)", (channel_id, user_id)
+            ).fetchone()[0]:
+                totals['active_users'] += 1
+        return totals
+    
+    def _ranked(self, table, channel_id, limit):
+        """Top rows of one leaderboard in the database"""
+        if table == 'messages':
+            return self.conn.execute(
+                "SELECT user_id, count FROM messages WHERE channel_id = ? ORDER BY count DESC LIMIT ?",
+                (channel_id, limit)
+            ).fetchall()
+        # Like the JSON backend, users stay ranked (at zero) once they have a counter in the category
+        return self.conn.execute(
+            f"SELECT r.user_id, r.{table} FROM channel_user_reactions r "
+            f"WHERE r.channel_id = ? AND (r.{table} > 0 OR EXISTS "
+            f"(SELECT 1 FROM {table} t WHERE t.channel_id = r.channel_id AND t.user_id = r.user_id)) "
+            f"ORDER BY r.{table} DESC LIMIT ?",
+            (channel_id, limit)
+        ).fetchall()
+    
+    def _ranked_user(self, table, channel_id, user_id):
+        """A user's leaderboard score in the database, or None if they are not ranked"""
+        if table == 'messages':
+            row = self.conn.execute(
+                "SELECT count FROM messages WHERE channel_id = ? AND user_id = ?", (channel_id, user_id)
+            ).fetchone()
+        else:
+            row = self.conn.execute(
+                f"SELECT r.{table} FROM channel_user_reactions r WHERE r.channel_id = ? AND r.user_id = ? "
+                f"AND (r.{table} > 0 OR EXISTS (SELECT 1 FROM {table} t WHERE t.channel_id = r.channel_id AND t.user_id = r.user_id))",
+                (channel_id, user_id)
+            ).fetchone()
+        return row[0] if row else None
+    
+    def channel_leaderboard(self, channel_id, limit):
+        changed = {table: {} for table in ('messages', *self.REACTION_TABLES.values())}
+        for (kind, user_id, _, _), (delta, added) in self._pending_changes(channel_id).items():
+            change = changed[self.REACTION_TABLES.get(kind, 'messages')].setdefault(user_id, [0, False])
+            change[0] += delta
+            change[1] = change[1] or added
+        
+        leaderboard = {}
+        for table, users in changed.items():
+            if not users:
+                leaderboard[table] = self._ranked(table, channel_id, limit)
+                continue
+            # Changed users can leave the top rows, so read enough rows to refill it
+            scores = dict(self._ranked(table, channel_id, limit + len(users)))
+            for user_id, (delta, added) in users.items():
+                score = scores.get(user_id)
+                if score is None:
+                    score = self._ranked_user(table, channel_id, user_id)
+                if score is None and not added:
+                    continue
+                scores[user_id] = (score or 0) + delta
+            leaderboard[table] = heapq.nlargest(limit, scores.items(), key=lambda x: x[1])
+        return leaderboard
+    
+    def user_channel_stats(self, user_id, channel_id):
+        row = self.conn.execute(
+            "SELECT count FROM messages WHERE user_id = ? AND channel_id = ?", (user_id, channel_id)
+        ).fetchone()
+        message_count = row[0] if row else 0
+        emoji_counts = {
+            kind: dict(self.conn.execute(
+                f"SELECT emoji, count FROM {table} WHERE user_id = ? AND channel_id = ? AND count > 0", (user_id, channel_id)
+            ))
+            for kind, table in self.REACTION_TABLES.items()
+        }
+        for (kind, _, _, emoji), (delta, _) in self._pending_changes(channel_id, user_id).items():
+            if kind == EVENT_MESSAGE:
+                message_count += delta
+                continue
+            count = emoji_counts[kind].get(emoji, 0) + delta
+            if count > 0:
+                emoji_counts[kind][emoji] = count
+            else:
+                emoji_counts[kind].pop(emoji, None)
+        return (message_count, emoji_counts[EVENT_REACTION_GIVEN], emoji_counts[EVENT_REACTION_RECEIVED])
+    
+    def export_data(self):
+        data = {
+            'messages': defaultdict(lambda: defaultdict(int)),
+            'reactions_given': defaultdict(lambda: defaultdict(dict)),
+            'reactions_received': defaultdict(lambda: defaultdict(dict))
+        }
+        for user_id, channel_id, count in self.conn.execute("SELECT user_id, channel_id, count FROM messages"):
+            data['messages'][user_id][channel_id] = count
+        for table in self.REACTION_TABLES.values():
+            for user_id, channel_id, emoji, count in self.conn.execute(
+                f"SELECT user_id, channel_id, emoji, count FROM {table}"
+            ):
+                emojis = data[table][user_id][channel_id]  # Zeroed counters keep the channel entry, as in JSON
+                if count > 0:
+                    emojis[emoji] = count
+        for (kind, user_id, channel_id, emoji), (delta, added) in self._pending_changes().items():
+            if kind == EVENT_MESSAGE:
+                data['messages'][user_id][channel_id] += delta
+                continue
+            table = self.REACTION_TABLES[kind]
+            if not added and channel_id not in data[table].get(user_id, {}):
+                continue
+            emojis = data[table][user_id][channel_id]
+            count = emojis.get(emoji, 0) + delta
+            if count > 0:
+                emojis[emoji] = count
+            else:
+                emojis.pop(emoji, None)
+        return data
+    
+    def range_scores(self, channel_id, start_day, end_day):
+        scores = {
+            category: dict(self.conn.execute(
+                "SELECT user_id, SUM(count) FROM day_counts "
+                "WHERE channel_id = ? AND kind = ? AND day BETWEEN ? AND ? GROUP BY user_id",
+                (channel_id, kind, start_day, end_day)
+            ))
+            for kind, category in DAY_CATEGORIES.items()
+        }
+        for (kind, user_id, _, day), (delta, _) in self._pending_changes(channel_id, days=True).items():
+            if start_day <= day <= end_day:
+                category_scores = scores[DAY_CATEGORIES[kind]]
+                score = category_scores.get(user_id, 0) + delta
+                if score > 0:
+                    category_scores[user_id] = score
+                else:
+                    category_scores.pop(user_id, None)
+        return scores
+
+def create_storage_backend():
+    """Create the storage backend selected by STORAGE_BACKEND (json or sqlite)"""
+    backend = os.getenv('STORAGE_BACKEND', 'json').lower()
+    interval = float(os.getenv('SAVE_INTERVAL_SECONDS', 5))
+    max_dirty_events = int(os.getenv('SAVE_MAX_DIRTY_EVENTS', 100))
+    
+    if backend == 'sqlite':
+        return SqliteStorageBackend(DATABASE_FILE, interval, max_dirty_events)
+    
+    if backend != 'json':
+        print(f"⚠️  Unknown STORAGE_BACKEND '{backend}', using json", flush=True)
+    
+    snapshot_format = os.getenv('SNAPSHOT_FORMAT', 'binary').lower()
+    if snapshot_format not in ('binary', 'json'):
+        print(f"⚠️  Unknown SNAPSHOT_FORMAT '{snapshot_format}', using binary", flush=True)
+        snapshot_format = 'binary'
+    
+    compression = os.getenv('SNAPSHOT_COMPRESSION', 'zlib').lower()
+    if compression not in SNAPSHOT_COMPRESSION:
+        print(f"⚠️  Unknown SNAPSHOT_COMPRESSION '{compression}', using zlib", flush=True)
+        compression = 'zlib'
+    
+    return JsonStorageBackend(
+        interval,
+        max_dirty_events,
+        compact_interval=float(os.getenv('COMPACT_INTERVAL_SECONDS', 300)),
+        compact_max_events=int(os.getenv('COMPACT_MAX_JOURNAL_EVENTS', 5000)),
+        snapshot_format=snapshot_format,
+        compression=compression,
+        json_export_interval=float(os.getenv('JSON_EXPORT_INTERVAL_SECONDS', 600))
+    )
+
+# Created in main() once the .env settings are loaded
+storage = None
+
+def record_event(kind, user_id, channel_id, delta=1, emoji=None, day=None):
+    """Apply a counter change through the active storage backend (day: UTC day ordinal of the message)"""
+    storage.record(kind, user_id, channel_id, delta, emoji, day)
+    response_cache.bump(channel_id)  # Cached stats embeds for this channel are now stale
+
+def parse_date(date_str):
+    """Parse date string in YYYY-MM-DD format and make it timezone-aware (UTC)"""
+    try:
+        # Parse the date and make it timezone-aware (UTC) to match Discord timestamps
+        naive_date = datetime.strptime(date_str, '%Y-%m-%d')
+        return naive_date.replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise ValueError(f"Invalid date format: {date_str}. Use YYYY-MM-DD format.")
+
+# Reaction user lists fetched at once during history scans (set from REACTION_FETCH_CONCURRENCY in main())
+REACTION_FETCH_CONCURRENCY = 4
+
+### jwc 25-1115-2100 Increase limit from 1,000 to 10,000 for more comprehensive history scan (vs. just today)
+BACKFILL_MESSAGE_LIMIT = 10000  # Scan last 10,000 messages for comprehensive history
+
+# Minimum seconds between two edits of a progress message (set from PROGRESS_EDIT_INTERVAL_SECONDS in main())
+PROGRESS_EDIT_INTERVAL = 2.0
+
+# Seconds a command waits for a running backfill before answering with partial data (set from BACKFILL_WAIT_SECONDS in main())
+BACKFILL_WAIT_SECONDS = 10.0
+
+# History scan modes: 'full' pages through reaction.users() to attribute reactions given and received,
+# 'count' only credits message authors with reaction.count (no per-user lookups)
+SCAN_MODES = ('full', 'count')
+DEFAULT_SCAN_MODE = 'full'  # Set from SCAN_MODE in main()
+
+def parse_scan_mode(value):
+    """Normalize a scan mode argument; returns None if it is not a known mode"""
+    if value is None:
+        return DEFAULT_SCAN_MODE
+    value = value.lower().lstrip('-')
+    return value if value in SCAN_MODES else None
+
+def parse_stats_args(args, allow_percentage=True):
+    """
+    Parse stats command arguments given in any order: a percentage, a scan mode and
+    --start=YYYY-MM-DD / --end=YYYY-MM-DD (UTC days, like the admin console options).
+    
+    Returns:
+        tuple: (options dict with percentage, scan_mode, start, end; None) or (None, error message)
+    """
+    options = {'percentage': 50, 'scan_mode': DEFAULT_SCAN_MODE, 'start': None, 'end': None}
+    
+    for arg in args:
+        name, _, value = arg.partition('=')
+        if name in ('--start', '-s', '--end', '-e'):
+            try:
+                options['start' if name in ('--start', '-s') else 'end'] = parse_date(value).date()
+            except ValueError as e:
+                return None, f"❌ {e}"
+        elif allow_percentage and arg.isdigit():
+            options['percentage'] = int(arg)
+        elif parse_scan_mode(arg) is not None:
+            options['scan_mode'] = parse_scan_mode(arg)
+        else:
+            return None, f"❌ Unknown argument `{arg}`. Use `!stats_help` to see the options."
+    
+    if options['start'] and options['end'] and options['start'] > options['end']:
+        return None, "❌ Start date must be before end date."
+    return options, None
+
+def date_range_days(options):
+    """Day ordinal range covered by parsed --start/--end options (open ends cover everything)"""
+    start_day = options['start'].toordinal() if options['start'] else date.min.toordinal()
+    end_day = options['end'].toordinal() if options['end'] else date.max.toordinal()
+    return start_day, end_day
+
+def describe_date_range(options):
+    """Human-readable date range, or None for all-time statistics"""
+    start, end = options['start'], options['end']
+    if start and end:
+        return f"{start.isoformat()} to {end.isoformat()}"
+    if start:
+        return f"From {start.isoformat()}"
+    if end:
+        return f"Until {end.isoformat()}"
+    return None
+
+async def fetch_reaction_users(messages, concurrency):
+    """
+    Fetch the users behind every reaction on a page of messages concurrently.
+    
+    At most `concurrency` reaction.users() iterators run at the same time; discord.py's
+    HTTP client still queues each request on its rate-limit bucket and retries 429s.
+    
+    Returns:
+        list: One list per message of (reaction, [users]) pairs, in message order
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    
+    async def fetch(reaction):
+        async with semaphore:
+            return [user async for user in reaction.users()]
+    
+    users = iter(await asyncio.gather(*(fetch(reaction) for message in messages for reaction in message.reactions)))
+    return [[(reaction, next(users)) for reaction in message.reactions] for message in messages]
+
+def record_message_reactions(channel_id, message, reactions):
+    """
+    Record the reactions of one scanned history message.
+    
+    Args:
+        reactions: (reaction, [users]) pairs; users is None for a count-only scan
+    
+    Returns:
+        int: Number of reactions counted
+    """
+    reactions_found = 0
+    message_author_id = str(message.author.id)
+    day = day_ordinal(message.created_at)  # Reactions count toward the day the message was posted
+    
+    for reaction, users in reactions:
+        emoji = str(reaction.emoji)
+        
+        if users is None:
+            # Credit the author straight from the payload, minus the bot's own reaction
+            # (reactors are not listed, so self-reactions and other bots are included)
+            received = reaction.count - (1 if reaction.me else 0)
+            if received > 0:
+                reactions_found += received
+                record_event(EVENT_REACTION_RECEIVED, message_author_id, channel_id, received, emoji, day)
+            continue
+        
+        # All users who reacted with this emoji
+        for user in users:
+            if user.bot:
+                continue  # Skip bot reactions
+            
+            user_id = str(user.id)
+            reactions_found += 1
+            
+            # Track reactions given by user
+            record_event(EVENT_REACTION_GIVEN, user_id, channel_id, 1, emoji, day)
+            
+            # Track reactions received by message author (don't count self-reactions)
+            if user_id != message_author_id:
+                record_event(EVENT_REACTION_RECEIVED, message_author_id, channel_id, 1, emoji, day)
+    
+    return reactions_found
+
+class ProgressReporter:
+    """
+    Rate-limited progress updates for one Discord status message.
+    
+    Long-running commands call update() as often as they like; at most one edit is sent per
+    min_interval seconds and it always carries the latest state, so progress edits don't eat
+    into the rate-limit budget the actual work needs. An update that arrives while an edit is
+    in flight is sent once that edit is done. finish() sends the final state. Outcomes are
+    counted in perf ('progress.updates', 'progress.edits.<outcome>') instead of being silently ignored.
+    
+    Args:
+        message: Status message to edit (None makes every call a no-op)
+        min_interval: Minimum seconds between two edits
+    """
+    
+    def __init__(self, message, min_interval=None):
+        self.message = message
+        self.min_interval = PROGRESS_EDIT_INTERVAL if min_interval is None else min_interval
+        self._latest = None
+        self._sent = None
+        self._last_edit = float('-inf')
+        self._pending = None  # Task that sends the latest state once the interval allows
+    
+    def update(self, content):
+        """Queue a progress state; it replaces any state that has not been sent yet"""
+        if self.message is None:
+            return
+        perf.count('progress.updates')
+        if self._pending is not None and not self._pending.done():
+            perf.count('progress.edits.coalesced')
+        else:
+            self._pending = asyncio.create_task(self._send_latest())
+        self._latest = content
+    
+    async def finish(self, content):
+        """Send the final state (still respecting the interval) and stop pending updates"""
+        if self._pending is not None and not self._pending.done():
+            self._pending.cancel()
+            perf.count('progress.edits.coalesced')
+        self._latest = content
+        await self._send_latest()
+    
+    async def _send_latest(self):
+        # Loop until the message shows the latest state: updates may arrive during an edit
+        while self.message is not None and self._latest != self._sent:
+            delay = self._last_edit + self.min_interval - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            
+            content = self._latest
+            if self.message is None or content == self._sent:
+                return
+            
+            self._last_edit = time.monotonic()
+            try:
+                await self.message.edit(content=content)
+                self._sent = content
+                perf.count('progress.edits.sent')
+            except discord.NotFound:
+                # The status message was deleted; nothing left to update
+                perf.count('progress.edits.failed')
+                self.message = None
+            except discord.HTTPException as e:
+                perf.count('progress.edits.failed')
+                if e.status == 429:
+                    perf.count('progress.edits.rate_limited')
+                logger.warning(f"Progress edit failed ({e.status}): {e}")
+                return  # The next update() or finish() tries again
+
+class BackfillJob:
+    """
+    History backfill of one channel.
+    
+    The scan walks backwards from the newest message; oldest_id is the oldest message
+    already counted, so an interrupted job continues before it.
+    """
+    
+    def __init__(self, channel_id, scan_mode, limit=BACKFILL_MESSAGE_LIMIT):
+        self.channel_id = channel_id
+        self.scan_mode = scan_mode
+        self.limit = limit
+        self.status = 'running'  # running, done or failed
+        self.messages_scanned = 0
+        self.reactions_found = 0
+        self.oldest_id = None
+        self.error = None
+        self.task = None  # asyncio task while the scan runs in this process
+        self.progress = ProgressReporter(None)  # Edits the status message of the command that started the scan
+    
+    @property
+    def active(self):
+        return self.task is not None and not self.task.done()
+    
+    @property
+    def percent(self):
+        if self.status == 'done':
+            return 100
+        return min(int(self.messages_scanned / self.limit * 100), 99)
+    
+    def progress_text(self):
+        return f"📊 {self.percent:3d}% | {self.messages_scanned:,} messages, {self.reactions_found:,} reactions"
+    
+    def to_state(self):
+        return {
+            'scan_mode': self.scan_mode,
+            'limit': self.limit,
+            'status': self.status,
+            'messages_scanned': self.messages_scanned,
+            'reactions_found': self.reactions_found,
+            'oldest_id': self.oldest_id,
+            'error': self.error
+        }
+    
+    @classmethod
+    def from_state(cls, channel_id, state):
+        job = cls(channel_id, state.get('scan_mode', 'full'), state.get('limit', BACKFILL_MESSAGE_LIMIT))
+        job.status = state.get('status', 'running')
+        job.messages_scanned = state.get('messages_scanned', 0)
+        job.reactions_found = state.get('reactions_found', 0)
+        job.oldest_id = state.get('oldest_id')
+        job.error = state.get('error')
+        return job
+
+class BackfillManager:
+    """
+    Background history backfills, at most one per channel.
+    
+    Commands start a job or attach to the one already running instead of scanning again, so
+    concurrent commands in an empty channel no longer double-count. After every page the
+    counters are flushed and the job state is saved to BACKFILL_FILE; jobs that were still
+    running when the bot stopped continue from their last page on the next start.
+    """
+    
+    def __init__(self, path=BACKFILL_FILE):
+        self.path = path
+        self.jobs = {}  # channel_id -> BackfillJob
+    
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                saved = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not read {self.path} ({e}); backfill jobs start over")
+            return
+        self.jobs = {channel_id: BackfillJob.from_state(channel_id, state) for channel_id, state in saved.items()}
+        
+        unfinished = sum(1 for job in self.jobs.values() if job.status != 'done')
+        if unfinished:
+            print(f"📥 {unfinished} unfinished history backfill(s) will resume once connected", flush=True)
+    
+    def save(self):
+        temp_file = self.path + '.tmp'
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump({channel_id: job.to_state() for channel_id, job in self.jobs.items()}, f, indent=2)
+            os.replace(temp_file, self.path)
+        except OSError as e:
+            print(f"❌ Error saving backfill state: {e}")
+    
+    def clear(self):
+        """Forget every job (used when the analytics data is cleared)"""
+        for job in self.jobs.values():
+            if job.active:
+                job.task.cancel()
+        self.jobs = {}
+        self.save()
+    
+    def start(self, channel, scan_mode, status_msg=None):
+        """Start the channel's backfill, or return the job already running for it"""
+        channel_id = str(channel.id)
+        job = self.jobs.get(channel_id)
+        if job is not None and job.active:
+            return job
+        
+        # A job left unfinished by a restart or an error continues where it stopped
+        if job is None or job.status == 'done':
+            job = self.jobs[channel_id] = BackfillJob(channel_id, scan_mode)
+        job.status = 'running'
+        job.error = None
+        job.progress = ProgressReporter(status_msg)
+        job.task = asyncio.create_task(self._run(job, channel))
+        self.save()
+        return job
+    
+    def resume_all(self, get_channel):
+        """Restart jobs that were running when the bot last stopped"""
+        for channel_id, job in list(self.jobs.items()):
+            if job.status == 'running' and not job.active:
+                channel = get_channel(int(channel_id))
+                if channel is not None:
+                    print(f"📥 Resuming history backfill for #{channel.name} ({job.percent}% done)", flush=True)
+                    self.start(channel, job.scan_mode)
+    
+    async def _run(self, job, channel):
+        try:
+            before = discord.Object(id=int(job.oldest_id)) if job.oldest_id else None
+            remaining = job.limit - job.messages_scanned
+            page = []
+            if remaining > 0:
+                async for message in channel.history(limit=remaining, before=before):
+                    page.append(message)
+                    if len(page) >= 100:
+                        await self._process_page(job, page)
+                        page = []
+                if page:
+                    await self._process_page(job, page)
+            job.status = 'done'
+            self.save()
+            await job.progress.finish(f"✅ **Historical scan complete!** {job.progress_text()}")
+        except asyncio.CancelledError:
+            raise  # Shutdown: the saved state resumes the job on the next start
+        except Exception as e:
+            job.status = 'failed'
+            job.error = str(e)
+            self.save()
+            await job.progress.finish(f"❌ Error scanning history: {str(e)}")
+    
+    @perf.timed('backfill.page')
+    async def _process_page(self, job, page):
+        # Reactor lists for the whole page are fetched concurrently (full mode only)
+        if job.scan_mode == 'count':
+            reactions = [[(reaction, None) for reaction in message.reactions] for message in page]
+        else:
+            reactions = await fetch_reaction_users(page, REACTION_FETCH_CONCURRENCY)
+        
+        # Counting, flushing and saving the job state happen without yielding to the event loop,
+        # so the saved oldest_id always matches the persisted counters
+        for message, message_reactions in zip(page, reactions):
+            job.reactions_found += record_message_reactions(job.channel_id, message, message_reactions)
+        job.messages_scanned += len(page)
+        job.oldest_id = str(page[-1].id)
+        storage.flush()
+        self.save()
+        
+        job.progress.update(f"🔍 **Scanning history...** {job.progress_text()}")
 
-async def ensure_reaction_data(ctx, progress_increment=10, scan_message="🔍 **No reaction data found. Scanning recent message history...**"):
+@perf.timed('ensure_reaction_data')
+async def ensure_reaction_data(ctx, scan_message="🔍 **No reaction data found. Scanning recent message history...**", scan_mode=None):
     """
-    Check if reaction data exists for the current channel, and if not, scan historical messages.
+    Check if reaction data exists for the current channel, and if not, backfill historical messages.
+    
+    The backfill runs as the channel's background job (shared with any other command that
+    needs it). This waits up to BACKFILL_WAIT_SECONDS for it; if the job is still running
+    after that, a partial-data notice is sent and the command answers with what has been
+    counted so far.
     
     Args:
         ctx: Discord command context
-        progress_increment: How often to show progress updates (10 = every 10%, 20 = every 20%)
         scan_message: Custom message to show when starting scan
+        scan_mode: 'full' (reactions given and received) or 'count' (reactions received only, from
+            reaction.count without listing reactors); defaults to SCAN_MODE
     
     Returns:
-        bool: True if data exists or was successfully scanned, False if error occurred
+        bool: True if complete or partial data can be shown, False if the scan failed
     """
     channel_id = str(ctx.channel.id)
+    job = backfill.jobs.get(channel_id)
     
-    # Check if we have any reaction data for this channel
-    has_reaction_data = False
-    for user_data in analytics_data['reactions_given'].values():
-        if channel_id in user_data and any(user_data[channel_id].values()):
-            has_reaction_data = True
-            break
-    
-    if not has_reaction_data:
-        for user_data in analytics_data['reactions_received'].values():
-            if channel_id in user_data and any(user_data[channel_id].values()):
-                has_reaction_data = True
-                break
-    
-    # If no reaction data exists, automatically scan recent history
-    if not has_reaction_data:
-        status_msg = await ctx.send(scan_message)
+    if job is None or not job.active:
+        # Nothing to do if the channel was backfilled before, or (from older versions) already has data
+        if job is not None and job.status == 'done':
+            return True
+        if job is None and storage.has_reaction_data(channel_id):
+            return True
         
-        try:
-            messages_scanned = 0
-            reactions_found = 0
+        status_msg = await ctx.send(scan_message)
+        job = backfill.start(ctx.channel, scan_mode or DEFAULT_SCAN_MODE, status_msg)
+    
+    await asyncio.wait({job.task}, timeout=BACKFILL_WAIT_SECONDS)
+    
+    if job.status == 'failed':
+        if job.progress.message is None:
+            await ctx.send(f"❌ Error scanning history: {job.error}")
+        return False
+    
+    if job.status != 'done':
+        await ctx.send(f"⏳ **Partial data** - history scan {job.percent}% done "
+                       f"({job.messages_scanned:,} messages so far). Run the command again later for complete statistics.")
+    return True
 
-            ### jwc 25-1115-2100 Increase limit from 1,000 to 10,000 for more comprehensive history scan (vs. just today)
-            limit = 10000  # Scan last 10,000 messages for comprehensive history
-            
-            last_update_percent = 0
-            
-            async for message in ctx.channel.history(limit=limit):
-                messages_scanned += 1
-                
-                # Process reactions on this message
-                for reaction in message.reactions:
-                    emoji = str(reaction.emoji)
-                    message_author_id = str(message.author.id)
-                    
-                    # Get all users who reacted with this emoji
-                    async for user in reaction.users():
-                        if user.bot:
-                            continue  # Skip bot reactions
-                        
-                        user_id = str(user.id)
-                        reactions_found += 1
-                        
-                        # Track reactions given by user
-                        analytics_data['reactions_given'][user_id][channel_id][emoji] += 1
-                        
-                        # Track reactions received by message author (don't count self-reactions)
-                        if user_id != message_author_id:
-                            analytics_data['reactions_received'][message_author_id][channel_id][emoji] += 1
-                
-                # Update progress with percentage
-                progress_percent = min(int((messages_scanned / limit) * 100), 100)
-                
-                # Show progress at specified increments
-                if progress_percent > 0 and progress_percent % progress_increment == 0 and progress_percent != last_update_percent:
-                    try:
-                        await status_msg.edit(content=f"🔍 **Scanning history...** 📊 {progress_percent:3d}% | {messages_scanned:,} messages, {reactions_found:,} reactions")
-                        last_update_percent = progress_percent
-                    except:
-                        pass  # Ignore edit errors
-                # Show progress every 50 messages to indicate activity
-                elif messages_scanned % 50 == 0:
-                    try:
-                        current_progress = min(int((messages_scanned / limit) * 100), 100)
-                        await status_msg.edit(content=f"🔍 **Scanning history...** 📊 {current_progress:3d}% | {messages_scanned:,} messages, {reactions_found:,} reactions")
-                    except:
-                        pass  # Ignore edit errors
-            
-            # Save the updated data
-            save_data(analytics_data)
-            
-            # Final status with completion
-            final_percent = min(int((messages_scanned / limit) * 100), 100)
-            await status_msg.edit(content=f"✅ **Historical scan complete!** 📊 {final_percent:3d}% | {messages_scanned:,} messages, {reactions_found:,} reactions")
-            
+class MessageDedupeCache:
+    """
+    TTL + LRU set of recently processed message IDs.
+    
+    Entries live in an OrderedDict kept in last-seen order, so expired entries are always at
+    the front and a check, insert or expiry is O(1) amortized regardless of capacity.
+    The counters are also published in perf as message_dedupe.* for !stats_perf.
+    
+    Args:
+        max_size: Maximum number of message IDs remembered
+        ttl: Seconds a message ID is remembered after it was last seen
+    """
+    
+    def __init__(self, max_size=10000, ttl=60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()  # message_id -> last seen (monotonic seconds)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+    
+    def __len__(self):
+        return len(self._entries)
+    
+    def check_and_add(self, message_id):
+        """True if the message was already seen within the TTL; otherwise remember it"""
+        now = time.monotonic()
+        
+        # Oldest entries come first, so expiry stops at the first live one
+        entries = self._entries
+        while entries:
+            oldest_id, seen = next(iter(entries.items()))
+            if now - seen <= self.ttl:
+                break
+            del entries[oldest_id]
+            self.expirations += 1
+            perf.count('message_dedupe.expirations')
+        
+        if message_id in entries:
+            entries[message_id] = now
+            entries.move_to_end(message_id)
+            self.hits += 1
+            perf.count('message_dedupe.hits')
             return True
-            
-        except Exception as e:
-            await status_msg.edit(content=f"❌ Error scanning history: {str(e)}")
-            return False
+        
+        entries[message_id] = now
+        self.misses += 1
+        perf.count('message_dedupe.misses')
+        while len(entries) > self.max_size:
+            entries.popitem(last=False)
+            self.evictions += 1
+            perf.count('message_dedupe.evictions')
+        return False
     
-    return True  # Data already exists
-
-# Load data on startup
-analytics_data = load_data()
+    def stats(self):
+        """Counters for monitoring: size, capacity, hits, misses, evictions, expirations"""
+        return {
+            'size': len(self._entries),
+            'max_size': self.max_size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations
+        }
 
-# Message deduplication cache to prevent Discord API duplicate events
-_processed_messages = {}
-_max_cache_size = 100
+class DisplayNameCache:
+    """
+    Persistent guild + user ID -> display name cache for leaderboards.
+    
+    Names come from the guild member cache when possible and from fetch_user() otherwise.
+    The bot does not chunk guilds at startup, so the first lookup that misses the member cache
+    loads members over the gateway: the whole guild once if it has at most `chunk_limit`
+    members, otherwise only the requested IDs via query_members() in batches of 100.
+    
+    resolve() deduplicates the requested IDs, fetches the missing ones concurrently (at most
+    `concurrency` at a time) and shares in-flight member requests and fetches between commands
+    asking for the same guild or user. Entries expire after `ttl` seconds and are dropped by
+    member/user update events. New names only mark the cache dirty; save() runs with the
+    storage flushes (see main()).
+    
+    Args:
+        path: JSON file the cache is kept in between restarts
+        ttl: Seconds a name stays valid
+        concurrency: Maximum number of fetch_user() calls at once
+        chunk_limit: Largest guild (member count) that is chunked completely
+    """
+    
+    QUERY_BATCH = 100  # Gateway limit for user IDs per query_members() request
+    
+    def __init__(self, path=NAMES_FILE, ttl=86400.0, concurrency=4, chunk_limit=1000):
+        self.path = path
+        self.ttl = ttl
+        self.concurrency = concurrency
+        self.chunk_limit = chunk_limit
+        self._names = {}  # guild_id -> user_id -> [display name, expires (epoch seconds)]
+        self._inflight = {}  # (guild_id, user_id) -> task of a running fetch_user()
+        self._chunking = {}  # guild_id -> task of a running guild.chunk()
+        self._querying = {}  # (guild_id, user_id) -> task of the query_members() batch that includes it
+        self._semaphore = None  # Created on first use so it binds to the running event loop
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.fetches = 0
+        self.failures = 0
+        self.invalidations = 0
+        self.chunks = 0
+        self.queries = 0
+    
+    def load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._names = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️  Could not read {self.path} ({e}); display names will be looked up again")
+            return
+        
+        # Drop entries that expired while the bot was offline
+        now = time.time()
+        for guild_id in list(self._names):
+            users = self._names[guild_id]
+            for user_id in [user_id for user_id, (_, expires) in users.items() if expires <= now]:
+                del users[user_id]
+            if not users:
+                del self._names[guild_id]
+    
+    def save(self):
+        if not self._dirty:
+            return
+        temp_file = self.path + '.tmp'
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self._names, f)
+            os.replace(temp_file, self.path)
+            self._dirty = False
+        except OSError as e:
+            print(f"❌ Error saving display name cache: {e}")
+    
+    def get(self, guild_id, user_id):
+        """Cached name, or None if missing or expired"""
+        entry = self._names.get(str(guild_id), {}).get(str(user_id))
+        if entry is None or entry[1] <= time.time():
+            return None
+        return entry[0]
+    
+    def put(self, guild_id, user_id, name):
+        self._names.setdefault(str(guild_id), {})[str(user_id)] = [name, time.time() + self.ttl]
+        self._dirty = True
+    
+    def invalidate(self, user_id, guild_id=None):
+        """Forget a user's name in one guild, or in every guild if guild_id is None"""
+        user_id = str(user_id)
+        guilds = [str(guild_id)] if guild_id is not None else list(self._names)
+        for gid in guilds:
+            if self._names.get(gid, {}).pop(user_id, None) is not None:
+                self.invalidations += 1
+                self._dirty = True
+    
+    def clear(self):
+        self._names = {}
+        self._dirty = True
+        self.save()
+    
+    async def resolve(self, guild, user_ids):
+        """
+        Display names for a set of users in a guild.
+        
+        Args:
+            guild: Guild whose member nicknames are preferred
+            user_ids: Iterable of user IDs (duplicates are looked up once)
+        
+        Returns:
+            dict: user_id (str) -> display name ("User <id>" if the user cannot be found)
+        """
+        guild_id = str(guild.id)
+        names = {}
+        missing = []
+        for user_id in dict.fromkeys(str(user_id) for user_id in user_ids):
+            name = self.get(guild_id, user_id)
+            if name is not None:
+                self.hits += 1
+                names[user_id] = name
+                continue
+            self.misses += 1
+            member = guild.get_member(int(user_id))
+            if member is not None:
+                names[user_id] = member.display_name
+                self.put(guild_id, user_id, member.display_name)
+            else:
+                missing.append(user_id)
+        
+        if missing:
+            # Load the members once over the gateway, then only users no longer in the guild are fetched
+            await self._load_members(guild, missing)
+            for user_id in list(missing):
+                member = guild.get_member(int(user_id))
+                if member is not None:
+                    names[user_id] = member.display_name
+                    self.put(guild_id, user_id, member.display_name)
+                    missing.remove(user_id)
+        
+        if missing:
+            found = await asyncio.gather(*(self._lookup(guild_id, user_id) for user_id in missing))
+            names.update(zip(missing, found))
+        return names
+    
+    async def _load_members(self, guild, user_ids):
+        """Fill the guild member cache for user_ids (chunk small guilds, query large ones)"""
+        guild_id = str(guild.id)
+        if guild.chunked:
+            return  # Everyone still in the guild is cached already
+        
+        if (guild.member_count or 0) <= self.chunk_limit:
+            task = self._chunking.get(guild_id)
+            if task is None:
+                task = self._chunking[guild_id] = asyncio.create_task(self._chunk(guild))
+                task.add_done_callback(lambda _: self._chunking.pop(guild_id, None))
+            await asyncio.shield(task)
+            return
+        
+        # Join batches other commands already requested, query the rest in new batches
+        tasks = {self._querying[(guild_id, user_id)] for user_id in user_ids if (guild_id, user_id) in self._querying}
+        new_ids = [user_id for user_id in user_ids if (guild_id, user_id) not in self._querying]
+        for start in range(0, len(new_ids), self.QUERY_BATCH):
+            batch = new_ids[start:start + self.QUERY_BATCH]
+            task = asyncio.create_task(self._query(guild, batch))
+            keys = [(guild_id, user_id) for user_id in batch]
+            for key in keys:
+                self._querying[key] = task
+            task.add_done_callback(lambda _, keys=keys: self._forget_query(keys))
+            tasks.add(task)
+        if tasks:
+            await asyncio.shield(asyncio.gather(*tasks))
+    
+    def _forget_query(self, keys):
+        for key in keys:
+            self._querying.pop(key, None)
+    
+    async def _chunk(self, guild):
+        self.chunks += 1
+        try:
+            with perf.timer('discord_gateway.chunk'):
+                await guild.chunk()
+            if DEBUG_MODE:
+                print(f"🔍 DEBUG: Chunked {len(guild.members)} members of {guild.name}")
+        except (asyncio.TimeoutError, discord.ClientException, discord.HTTPException) as e:
+            logger.warning(f"Member chunking failed for guild {guild.id}: {e}")
+    
+    async def _query(self, guild, user_ids):
+        self.queries += 1
+        try:
+            with perf.timer('discord_gateway.query_members'):
+                await guild.query_members(user_ids=[int(user_id) for user_id in user_ids], limit=len(user_ids), cache=True)
+        except (asyncio.TimeoutError, discord.ClientException, discord.HTTPException) as e:
+            logger.warning(f"Member query failed for guild {guild.id}: {e}")
+    
+    async def _lookup(self, guild_id, user_id):
+        key = (guild_id, user_id)
+        task = self._inflight.get(key)
+        if task is None:
+            # First caller starts the fetch; later callers for the same user wait on it
+            task = self._inflight[key] = asyncio.create_task(self._fetch(guild_id, user_id))
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(task)
+    
+    async def _fetch(self, guild_id, user_id):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        async with self._semaphore:
+            self.fetches += 1
+            try:
+                user = await bot.fetch_user(int(user_id))
+            except discord.HTTPException as e:
+                self.failures += 1
+                if DEBUG_MODE:
+                    print(f"🔍 DEBUG: fetch_user({user_id}) failed: {e}")
+                return f"User {user_id}"
+        self.put(guild_id, user_id, user.display_name)
+        return user.display_name
+    
+    def stats(self):
+        """Counters for monitoring: size, hits, misses, member chunks/queries, fetches, failures, invalidations"""
+        return {
+            'size': sum(len(users) for users in self._names.values()),
+            'hits': self.hits,
+            'misses': self.misses,
+            'chunks': self.chunks,
+            'queries': self.queries,
+            'fetches': self.fetches,
+            'failures': self.failures,
+            'invalidations': self.invalidations
+        }
 
-def is_message_processed(message_id):
-    """Check if message has been processed recently"""
-    import time
-    current_time = time.time()
+class ResponseCache:
+    """
+    LRU cache of stats command embeds, tagged with the data version they were built from.
     
-    # Clean old entries (older than 60 seconds)
-    expired = [msg_id for msg_id, timestamp in _processed_messages.items() 
-               if current_time - timestamp > 60]
-    for msg_id in expired:
-        del _processed_messages[msg_id]
+    Every counter change bumps its channel's version (see record_event), and name or bulk
+    data changes bump a global epoch, so a cached embed is only served while nothing it
+    shows has changed. Stale entries are dropped when looked up; the least recently used
+    entries are evicted once the cached embeds exceed max_bytes (JSON size). The embed
+    timestamp is not cached: each served copy is stamped with the time it is sent. The
+    counters are also published in perf as response_cache.* for !stats_perf.
     
-    # Check if already processed
-    if message_id in _processed_messages:
-        return True
+    Args:
+        max_bytes: Memory budget for cached embeds
+    """
+    
+    def __init__(self, max_bytes=1_000_000):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (version, embed dict, size)
+        self._versions = {}  # channel_id -> number of changes seen
+        self._epoch = 0
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+        self.evictions = 0
+    
+    def version(self, channel_id):
+        """Current data version of a channel (take it before building a response)"""
+        return self._epoch, self._versions.get(channel_id, 0)
+    
+    def bump(self, channel_id):
+        self._versions[channel_id] = self._versions.get(channel_id, 0) + 1
     
-    # Mark as processed
-    _processed_messages[message_id] = current_time
+    def invalidate_all(self):
+        """Make every cached response stale (display names changed, data cleared)"""
+        self._epoch += 1
+        self._entries.clear()
+        self.bytes = 0
     
-    # Limit cache size
-    if len(_processed_messages) > _max_cache_size:
-        oldest = min(_processed_messages.items(), key=lambda x: x[1])
-        del _processed_messages[oldest[0]]
+    def get(self, key, channel_id):
+        """A fresh copy of the cached embed, or None if missing or stale"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            perf.count('response_cache.misses')
+            return None
+        version, embed_dict, size = entry
+        if version != self.version(channel_id):
+            del self._entries[key]
+            self.bytes -= size
+            self.stale += 1
+            self.misses += 1
+            perf.count('response_cache.stale')
+            perf.count('response_cache.misses')
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        perf.count('response_cache.hits')
+        embed = discord.Embed.from_dict(embed_dict)
+        embed.timestamp = datetime.utcnow()
+        return embed
     
-    return False
+    def put(self, key, version, embed):
+        """Cache an embed built from data at `version`"""
+        if version[0] != self._epoch:
+            return  # Invalidated while the response was being built
+        embed_dict = embed.to_dict()
+        embed_dict.pop('timestamp', None)  # Set again when served
+        size = len(json.dumps(embed_dict, default=str))
+        if size > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.bytes -= old[2]
+        self._entries[key] = (version, embed_dict, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, _, evicted_size) = self._entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+            perf.count('response_cache.evictions')
+    
+    def stats(self):
+        """Counters for monitoring: entries, bytes, hits, misses, stale, evictions, hit rate"""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.bytes,
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+            'stale': self.stale,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups else 0.0
+        }
+
+# Message deduplication cache to prevent Discord API duplicate events (created in main())
+message_dedupe = None
+
+# History backfill jobs per channel (created in main())
+backfill = None
+
+# Leaderboard display names (created in main())
+display_names = None
+
+# Cached stats command embeds (created in main())
+response_cache = None
+
+# Event loop lag sampler and stall detector (created in main())
+loop_monitor = None
+
+def is_message_processed(message_id):
+    """Check if message has been processed recently"""
+    return message_dedupe.check_and_add(message_id)
 
 @bot.event
 async def on_ready():
     print(f'{bot.user} has connected to Discord!')
     print(f'Bot is in {len(bot.guilds)} server_guilds')
     
+    # Continue history backfills interrupted by the last shutdown
+    backfill.resume_all(bot.get_channel)
+    
     if DEBUG_MODE:
         print(f"\n🔍 DEBUG: Bot startup complete")
         print(f"   Bot User ID: {bot.user.id}")
@@ -285,196 +3537,193 @@ async def on_ready():
         print(f"   Guilds connected to:")
         for guild in bot.guilds:
             print(f"     - {guild.name} (ID: {guild.id}, Members: {guild.member_count})")
-        print(f"   Data file: {DATA_FILE}")
-        print(f"   Existing data loaded: {len(analytics_data['messages'])} users with messages, {len(analytics_data['reactions_given'])} users with reactions given")
+        data = storage.export_data()
+        print(f"   Storage backend: {storage.name}")
+        print(f"   Existing data loaded: {len(data['messages'])} users with messages, {len(data['reactions_given'])} users with reactions given")
         print("="*60)
 
+@bot.event
+async def on_member_update(before, after):
+    # Nickname or guild profile changes make the cached leaderboard name stale
+    if before.display_name != after.display_name:
+        display_names.invalidate(after.id, after.guild.id)
+        response_cache.invalidate_all()
+
+@bot.event
+async def on_user_update(before, after):
+    # Global name changes apply in every guild
+    display_names.invalidate(after.id)
+    response_cache.invalidate_all()
+
 @bot.event
 async def on_message(message):
-    # Deduplicate messages - check if we've already processed this message
-    if is_message_processed(message.id):
-        if DEBUG_MODE:
-            print(f"🔍 DEBUG: DUPLICATE message detected and skipped (ID: {message.id})")
-        return
-    
-    # Don't count bot messages
-    if message.author.bot:
+    # Timed without the command it may trigger (commands are timed on their own)
+    with perf.timer('event.on_message'):
+        # Deduplicate messages - check if we've already processed this message
+        if is_message_processed(message.id):
+            if DEBUG_MODE:
+                print(f"🔍 DEBUG: DUPLICATE message detected and skipped (ID: {message.id})")
+            perf.count('events.duplicate_messages')
+            return
+        
+        # Don't count bot messages
+        if message.author.bot:
+            if DEBUG_MODE:
+                is_self = message.author.id == bot.user.id
+                bot_type = "THIS BOT (self)" if is_self else "OTHER BOT"
+                print(f"🔍 DEBUG: Ignoring bot message from {message.author.name} [{bot_type}]")
+                print(f"   ℹ️  Reason: Bot messages are excluded from analytics to track only human user activity")
+                print(f"   🤖 Bot ID: {message.author.id}")
+                print(f"   🆔 Message ID: {message.id}")
+                if message.content:
+                    print(f"   💬 Message content: {message.content[:50]}{'...' if len(message.content) > 50 else ''}")
+                elif message.embeds:
+                    print(f"   📊 Message type: Embed message (no text content)")
+                else:
+                    print(f"   💬 Message type: Empty or system message")
+            perf.count('events.bot_messages_ignored')
+            return
+        
+        user_id = str(message.author.id)
+        channel_id = str(message.channel.id)
+        
+        # Debug logging for all messages (not just commands)
         if DEBUG_MODE:
-            is_self = message.author.id == bot.user.id
-            bot_type = "THIS BOT (self)" if is_self else "OTHER BOT"
-            print(f"🔍 DEBUG: Ignoring bot message from {message.author.name} [{bot_type}]")
-            print(f"   ℹ️  Reason: Bot messages are excluded from analytics to track only human user activity")
-            print(f"   🤖 Bot ID: {message.author.id}")
-            print(f"   🆔 Message ID: {message.id}")
-            if message.content:
-                print(f"   💬 Message content: {message.content[:50]}{'...' if len(message.content) > 50 else ''}")
-            elif message.embeds:
-                print(f"   📊 Message type: Embed message (no text content)")
-            else:
-                print(f"   💬 Message type: Empty or system message")
-        return
-    
-    user_id = str(message.author.id)
-    channel_id = str(message.channel.id)
-    
-    # Debug logging for all messages (not just commands)
-    if DEBUG_MODE:
-        print(f"\n🔍 DEBUG: Message received")
-        print(f"   👤 User: {message.author.name} (ID: {user_id})")
-        print(f"   📝 Channel: #{message.channel.name} (ID: {channel_id})")
-        print(f"   💬 Content: {message.content[:100]}{'...' if len(message.content) > 100 else ''}")
-        print(f"   🕐 Timestamp: {message.created_at}")
-        
-        # Show current message count before increment
-        current_count = analytics_data['messages'].get(user_id, {}).get(channel_id, 0)
-        print(f"   📊 Current message count for user in this channel: {current_count}")
-    
-    # Debug logging for commands
-    if DEBUG_MODE and message.content.startswith('!'):
-        print(f"   🤖 This is a command!")
-        print(f"   Current total users tracked: {len(analytics_data['messages'])}")
-    
-    # Track message count
-    if user_id not in analytics_data['messages']:
-        analytics_data['messages'][user_id] = defaultdict(int)
+            print(f"\n🔍 DEBUG: Message received")
+            print(f"   👤 User: {message.author.name} (ID: {user_id})")
+            print(f"   📝 Channel: #{message.channel.name} (ID: {channel_id})")
+            print(f"   💬 Content: {message.content[:100]}{'...' if len(message.content) > 100 else ''}")
+            print(f"   🕐 Timestamp: {message.created_at}")
+            
+            # Show current message count before increment
+            current_count = storage.user_channel_stats(user_id, channel_id)[0]
+            print(f"   📊 Current message count for user in this channel: {current_count}")
+        
+        # Debug logging for commands
+        if DEBUG_MODE and message.content.startswith('!'):
+            print(f"   🤖 This is a command!")
+        
+        # Track message count (also in the bucket for the UTC day it was posted)
+        record_event(EVENT_MESSAGE, user_id, channel_id, day=day_ordinal(message.created_at))
+        
         if DEBUG_MODE:
-            print(f"   ➕ New user added to message tracking: {user_id}")
-    
-    old_count = analytics_data['messages'][user_id][channel_id]
-    analytics_data['messages'][user_id][channel_id] += 1
-    new_count = analytics_data['messages'][user_id][channel_id]
-    
-    if DEBUG_MODE:
-        print(f"   📈 Message count updated: {old_count} → {new_count}")
-    
-    save_data(analytics_data)
-    
+            print(f"   📈 Message count updated: {current_count} → {storage.user_channel_stats(user_id, channel_id)[0]}")
+        
     # Process commands
     await bot.process_commands(message)
 
 @bot.event
 async def on_reaction_add(reaction, user):
-    # Don't count bot reactions
-    if user.bot:
+    with perf.timer('event.on_reaction_add'):
+        # Don't count bot reactions
+        if user.bot:
+            if DEBUG_MODE:
+                print(f"🔍 DEBUG: Ignoring bot REACTION from {user.name}")
+                print(f"   ℹ️  Reason: Bot reactions are excluded from analytics to track only human user activity")
+                print(f"   🤖 Bot ID: {user.id}")
+                print(f"   😀 Emoji: {reaction.emoji}")
+            return
+        
+        user_id = str(user.id)
+        channel_id = str(reaction.message.channel.id)
+        emoji = str(reaction.emoji)
+        message_author_id = str(reaction.message.author.id)
+        
+        # Debug logging
         if DEBUG_MODE:
-            print(f"🔍 DEBUG: Ignoring bot REACTION from {user.name}")
-            print(f"   ℹ️  Reason: Bot reactions are excluded from analytics to track only human user activity")
-            print(f"   🤖 Bot ID: {user.id}")
-            print(f"   😀 Emoji: {reaction.emoji}")
-        return
-    
-    user_id = str(user.id)
-    channel_id = str(reaction.message.channel.id)
-    emoji = str(reaction.emoji)
-    message_author_id = str(reaction.message.author.id)
-    
-    # Debug logging
-    if DEBUG_MODE:
-        print(f"\n🔍 DEBUG: Reaction Event Triggered!")
-        print(f"   👤 User: {user.name} (ID: {user_id})")
-        print(f"   📝 Channel: #{reaction.message.channel.name} (ID: {channel_id})")
-        print(f"   😀 Emoji: {emoji}")
-        print(f"   📨 Message Author: {reaction.message.author.name} (ID: {message_author_id})")
-        
-        print(f"\n📊 BEFORE - Analytics Data:")
-        print(f"   reactions_given keys: {list(analytics_data['reactions_given'].keys())}")
-        print(f"   reactions_received keys: {list(analytics_data['reactions_received'].keys())}")
-        
-        if user_id in analytics_data['reactions_given']:
-            print(f"   User {user_id} reactions_given: {dict(analytics_data['reactions_given'][user_id])}")
-        else:
-            print(f"   User {user_id} not in reactions_given yet")
-            
-        if message_author_id in analytics_data['reactions_received']:
-            print(f"   Author {message_author_id} reactions_received: {dict(analytics_data['reactions_received'][message_author_id])}")
-        else:
-            print(f"   Author {message_author_id} not in reactions_received yet")
-    
-    # Track reactions given by user
-    if user_id not in analytics_data['reactions_given']:
-        analytics_data['reactions_given'][user_id] = defaultdict(lambda: defaultdict(int))
-    analytics_data['reactions_given'][user_id][channel_id][emoji] += 1
-    
-    # Track reactions received by message author
-    if message_author_id not in analytics_data['reactions_received']:
-        analytics_data['reactions_received'][message_author_id] = defaultdict(lambda: defaultdict(int))
-    analytics_data['reactions_received'][message_author_id][channel_id][emoji] += 1
-    
-    save_data(analytics_data)
-    
-    # Debug logging after
-    if DEBUG_MODE:
-        print(f"\n📊 AFTER - Analytics Data:")
-        if user_id in analytics_data['reactions_given']:
-            print(f"   User {user_id} reactions_given: {dict(analytics_data['reactions_given'][user_id])}")
-        else:
-            print(f"   ❌ User {user_id} STILL not in reactions_given!")
+            print(f"\n🔍 DEBUG: Reaction Event Triggered!")
+            print(f"   👤 User: {user.name} (ID: {user_id})")
+            print(f"   📝 Channel: #{reaction.message.channel.name} (ID: {channel_id})")
+            print(f"   😀 Emoji: {emoji}")
+            print(f"   📨 Message Author: {reaction.message.author.name} (ID: {message_author_id})")
             
-        if message_author_id in analytics_data['reactions_received']:
-            print(f"   Author {message_author_id} reactions_received: {dict(analytics_data['reactions_received'][message_author_id])}")
-        else:
-            print(f"   ❌ Author {message_author_id} STILL not in reactions_received!")
+            print(f"\n📊 BEFORE - Analytics Data:")
+            print(f"   User {user_id} reactions_given in channel: {storage.user_channel_stats(user_id, channel_id)[1]}")
+            print(f"   Author {message_author_id} reactions_received in channel: {storage.user_channel_stats(message_author_id, channel_id)[2]}")
+        
+        # Reactions count toward the UTC day the message was posted, like history scans
+        day = day_ordinal(reaction.message.created_at)
+        
+        # Track reactions given by user
+        record_event(EVENT_REACTION_GIVEN, user_id, channel_id, 1, emoji, day)
         
-        print(f"   📁 Data saved to file")
-        print("="*50)
+        # Track reactions received by message author
+        record_event(EVENT_REACTION_RECEIVED, message_author_id, channel_id, 1, emoji, day)
+        
+        # Debug logging after
+        if DEBUG_MODE:
+            print(f"\n📊 AFTER - Analytics Data:")
+            print(f"   User {user_id} reactions_given in channel: {storage.user_channel_stats(user_id, channel_id)[1]}")
+            print(f"   Author {message_author_id} reactions_received in channel: {storage.user_channel_stats(message_author_id, channel_id)[2]}")
+            
+            print(f"   📁 Events queued for the journal")
+            print("="*50)
 
 @bot.event
 async def on_reaction_remove(reaction, user):
-    # Don't count bot reactions
-    if user.bot:
-        return
-    
-    user_id = str(user.id)
-    channel_id = str(reaction.message.channel.id)
-    emoji = str(reaction.emoji)
-    message_author_id = str(reaction.message.author.id)
-    
-    # Remove from reactions given
-    if (user_id in analytics_data['reactions_given'] and 
-        channel_id in analytics_data['reactions_given'][user_id] and
-        emoji in analytics_data['reactions_given'][user_id][channel_id]):
-        analytics_data['reactions_given'][user_id][channel_id][emoji] -= 1
-        if analytics_data['reactions_given'][user_id][channel_id][emoji] <= 0:
-            del analytics_data['reactions_given'][user_id][channel_id][emoji]
-    
-    # Remove from reactions received
-    if (message_author_id in analytics_data['reactions_received'] and 
-        channel_id in analytics_data['reactions_received'][message_author_id] and
-        emoji in analytics_data['reactions_received'][message_author_id][channel_id]):
-        analytics_data['reactions_received'][message_author_id][channel_id][emoji] -= 1
-        if analytics_data['reactions_received'][message_author_id][channel_id][emoji] <= 0:
-            del analytics_data['reactions_received'][message_author_id][channel_id][emoji]
-    
-    save_data(analytics_data)
+    with perf.timer('event.on_reaction_remove'):
+        # Don't count bot reactions
+        if user.bot:
+            return
+        
+        user_id = str(user.id)
+        channel_id = str(reaction.message.channel.id)
+        emoji = str(reaction.emoji)
+        message_author_id = str(reaction.message.author.id)
+        
+        # Remove from reactions given and received (counters are dropped once they reach zero)
+        day = day_ordinal(reaction.message.created_at)
+        record_event(EVENT_REACTION_GIVEN, user_id, channel_id, -1, emoji, day)
+        record_event(EVENT_REACTION_RECEIVED, message_author_id, channel_id, -1, emoji, day)
+
+@bot.before_invoke
+async def start_command_timer(ctx):
+    ctx.perf_started = time.perf_counter()
+
+@bot.after_invoke
+async def stop_command_timer(ctx):
+    # Also called when the command raised; ctx.command_failed tells which
+    perf.observe(f'command.{ctx.command.qualified_name}', time.perf_counter() - ctx.perf_started, ctx.command_failed)
 
 @bot.command(name='stats_user')
-async def user_stats(ctx, member: discord.Member = None):
-    """Show statistics for a user (or yourself if no user specified)"""
+async def user_stats(ctx, member: typing.Optional[discord.Member] = None, scan_mode: str = None):
+    """Show statistics for a user (or yourself if no user specified)
+    
+    Args:
+        scan_mode: History scan mode if a scan is needed: full or count (default: SCAN_MODE)
+    """
     if member is None:
         member = ctx.author
     
+    mode = parse_scan_mode(scan_mode)
+    if mode is None:
+        await ctx.send(f"❌ Scan mode must be one of: {', '.join(SCAN_MODES)}")
+        return
+    
     user_id = str(member.id)
     channel_id = str(ctx.channel.id)
     
     # Ensure reaction data exists, scan if needed
     scan_success = await ensure_reaction_data(
         ctx, 
-        progress_increment=20, 
-        scan_message="🔍 **No reaction data found. Scanning recent message history for complete user statistics...**"
+        scan_message="🔍 **No reaction data found. Scanning recent message history for complete user statistics...**",
+        scan_mode=mode
     )
     
     if not scan_success:
         return  # Error occurred during scanning
     
-    # Get message count
-    message_count = analytics_data['messages'].get(user_id, {}).get(channel_id, 0)
+    # Served from the cache until this channel's data changes
+    cache_key = ('stats_user', channel_id, user_id)
+    version = response_cache.version(channel_id)
+    embed = response_cache.get(cache_key, channel_id)
+    if embed is not None:
+        await ctx.send(embed=embed)
+        return
     
-    # Get reactions given
-    reactions_given = analytics_data['reactions_given'].get(user_id, {}).get(channel_id, {})
+    # Get message count and per-emoji reactions given/received
+    message_count, reactions_given, reactions_received = storage.user_channel_stats(user_id, channel_id)
     total_reactions_given = sum(reactions_given.values())
-    
-    # Get reactions received
-    reactions_received = analytics_data['reactions_received'].get(user_id, {}).get(channel_id, {})
     total_reactions_received = sum(reactions_received.values())
     
     embed = discord.Embed(
@@ -503,7 +3752,7 @@ async def user_stats(ctx, member: discord.Member = None):
     
     # Show top reactions given
     if reactions_given:
-        top_given = sorted(reactions_given.items(), key=lambda x: x[1], reverse=True)[:5]
+        top_given = heapq.nlargest(5, reactions_given.items(), key=lambda x: x[1])
         given_text = "\n".join([f"{emoji}: {count}" for emoji, count in top_given])
         embed.add_field(
             name="🎯 Top Reactions Given",
@@ -513,7 +3762,7 @@ async def user_stats(ctx, member: discord.Member = None):
     
     # Show top reactions received
     if reactions_received:
-        top_received = sorted(reactions_received.items(), key=lambda x: x[1], reverse=True)[:5]
+        top_received = heapq.nlargest(5, reactions_received.items(), key=lambda x: x[1])
         received_text = "\n".join([f"{emoji}: {count}" for emoji, count in top_received])
         embed.add_field(
             name="🏆 Top Reactions Received",
@@ -524,17 +3773,26 @@ async def user_stats(ctx, member: discord.Member = None):
     embed.set_thumbnail(url=member.avatar.url if member.avatar else member.default_avatar.url)
     embed.set_footer(text=f"Channel: #{ctx.channel.name}")
     
+    response_cache.put(cache_key, version, embed)
     await ctx.send(embed=embed)
 
 @bot.command(name='stats')
-async def stats_leaderboard(ctx, percentage: int = 50):
+async def stats_leaderboard(ctx, *args):
     """Show leaderboards for all categories: messages, reactions given, and reactions received
     
-    Args:
+    Args (any order):
         percentage: Percentage of top users to show (default: 50%, range: 1-100%)
+        scan_mode: History scan mode if a scan is needed: full or count (default: SCAN_MODE)
+        --start=YYYY-MM-DD / --end=YYYY-MM-DD: Only count messages posted in this UTC date range
     """
     channel_id = str(ctx.channel.id)
     
+    options, error = parse_stats_args(args)
+    if error:
+        await ctx.send(error)
+        return
+    percentage = options['percentage']
+    
     # Validate percentage parameter
     if percentage < 1 or percentage > 100:
         await ctx.send("❌ Percentage must be between 1 and 100!")
@@ -543,100 +3801,88 @@ async def stats_leaderboard(ctx, percentage: int = 50):
     # Ensure reaction data exists, scan if needed
     scan_success = await ensure_reaction_data(
         ctx, 
-        progress_increment=10, 
-        scan_message="🔍 **No reaction data found. Scanning recent message history for complete statistics...**"
+        scan_message="🔍 **No reaction data found. Scanning recent message history for complete statistics...**",
+        scan_mode=options['scan_mode']
     )
     
     if not scan_success:
         return  # Error occurred during scanning
     
-    # Collect data for all categories
-    categories = {
-        'messages': {},
-        'reactions_given': {},
-        'reactions_received': {}
-    }
-    
-    # Get messages data
-    for user_id, channels in analytics_data['messages'].items():
-        if channel_id in channels:
-            categories['messages'][user_id] = channels[channel_id]
-    
-    # Get reactions given data
-    for user_id, channels in analytics_data['reactions_given'].items():
-        if channel_id in channels:
-            categories['reactions_given'][user_id] = sum(channels[channel_id].values())
+    # Served from the cache until this channel's data changes
+    cache_key = ('stats', channel_id, percentage, options['start'], options['end'])
+    version = response_cache.version(channel_id)
+    embed = response_cache.get(cache_key, channel_id)
+    if embed is not None:
+        await ctx.send(embed=embed)
+        return
     
-    # Get reactions received data
-    for user_id, channels in analytics_data['reactions_received'].items():
-        if channel_id in channels:
-            categories['reactions_received'][user_id] = sum(channels[channel_id].values())
+    # Date ranges are answered from the per-day counters; no Discord history calls
+    date_range = describe_date_range(options)
+    if date_range:
+        start_day, end_day = date_range_days(options)
+        total_users = storage.range_totals(channel_id, start_day, end_day)['active_users']
+    else:
+        # All unique users across all categories
+        total_users = storage.channel_totals(channel_id)['active_users']
     
     # Check if we have any data after scanning
-    if not any(categories.values()):
-        await ctx.send("📊 No data available for this channel yet! Try posting some messages and adding reactions.")
+    if total_users == 0:
+        if date_range:
+            await ctx.send(f"📊 No activity recorded in this channel for this date range ({date_range}).")
+        else:
+            await ctx.send("📊 No data available for this channel yet! Try posting some messages and adding reactions.")
         return
     
-    # Get all unique users across all categories
-    all_users = set()
-    for category_data in categories.values():
-        all_users.update(category_data.keys())
-    
     # Calculate how many users to show based on percentage
-    total_users = len(all_users)
     users_to_show = max(1, int(total_users * percentage / 100))
     
+    # Top users per category come pre-sorted from the storage backend
+    if date_range:
+        categories = storage.range_leaderboard(channel_id, start_day, end_day, users_to_show)
+    else:
+        categories = storage.channel_leaderboard(channel_id, users_to_show)
+    
     embed = discord.Embed(
-        title=f"🏆 Channel Leaderboard (Top {percentage}%)",
+        title=f"🏆 Channel Leaderboard (Top {percentage}%)" + (f"\n📅 {date_range}" if date_range else ""),
         color=discord.Color.gold(),
         timestamp=datetime.utcnow()
     )
     
+    # Every user in the three categories is looked up once, missing names concurrently
+    names = await display_names.resolve(
+        ctx.guild, (user_id for rows in categories.values() for user_id, _ in rows)
+    )
+    
     # Helper function to format leaderboard
-    async def format_leaderboard(user_scores, limit):
-        if not user_scores:
+    def format_leaderboard(sorted_users):
+        if not sorted_users:
             return "No data available"
         
-        sorted_users = sorted(user_scores.items(), key=lambda x: x[1], reverse=True)[:limit]
         leaderboard_text = ""
         
         for i, (user_id, score) in enumerate(sorted_users, 1):
-            try:
-                # Try to get member from guild first (most reliable)
-                member = ctx.guild.get_member(int(user_id))
-                if member:
-                    username = member.display_name
-                else:
-                    # Fallback: Try to fetch user from Discord API
-                    try:
-                        user = await bot.fetch_user(int(user_id))
-                        username = user.display_name if user else f"User {user_id}"
-                    except:
-                        username = f"User {user_id}"
-            except:
-                username = f"User {user_id}"
-            
+            username = names.get(str(user_id), f"User {user_id}")
             medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
             leaderboard_text += f"{medal} **{username}**: {score:,}\n"
         
         return leaderboard_text
     
-    # Add each category as a field (await the async function)
+    # Add each category as a field
     embed.add_field(
         name="💬 Messages Posted",
-        value=await format_leaderboard(categories['messages'], users_to_show),
+        value=format_leaderboard(categories['messages']),
         inline=True
     )
     
     embed.add_field(
         name="👍 Reactions Given",
-        value=await format_leaderboard(categories['reactions_given'], users_to_show),
+        value=format_leaderboard(categories['reactions_given']),
         inline=True
     )
     
     embed.add_field(
         name="⭐ Reactions Received",
-        value=await format_leaderboard(categories['reactions_received'], users_to_show),
+        value=format_leaderboard(categories['reactions_received']),
         inline=True
     )
     
@@ -647,6 +3893,7 @@ async def stats_leaderboard(ctx, percentage: int = 50):
         `!stats` - Top 50% (default)
         `!stats 25` - Top 25%
         `!stats 100` - All users
+        `!stats --start=2024-01-01 --end=2024-01-31` - January 2024 only
         """,
         inline=False
     )
@@ -659,11 +3906,17 @@ async def stats_leaderboard(ctx, percentage: int = 50):
     
     embed.set_footer(text=f"Channel: #{ctx.channel.name} • Top {users_to_show} of {total_users} users ({percentage}%)")
     
+    response_cache.put(cache_key, version, embed)
     await ctx.send(embed=embed)
 
 @bot.command(name='stats_mini')
-async def stats_mini(ctx):
-    """Show overall statistics for the current channel"""
+async def stats_mini(ctx, *args):
+    """Show overall statistics for the current channel
+    
+    Args (any order):
+        scan_mode: History scan mode if a scan is needed: full or count (default: SCAN_MODE)
+        --start=YYYY-MM-DD / --end=YYYY-MM-DD: Only count messages posted in this UTC date range
+    """
     if DEBUG_MODE:
         print(f"\n🔍 DEBUG: stats_mini command STARTED")
         print(f"   👤 User: {ctx.author.name}")
@@ -671,41 +3924,42 @@ async def stats_mini(ctx):
     
     channel_id = str(ctx.channel.id)
     
+    options, error = parse_stats_args(args, allow_percentage=False)
+    if error:
+        await ctx.send(error)
+        return
+    
     # Ensure reaction data exists, scan if needed
     scan_success = await ensure_reaction_data(
         ctx, 
-        progress_increment=10, 
-        scan_message="🔍 **No reaction data found. Scanning recent message history...**"
+        scan_message="🔍 **No reaction data found. Scanning recent message history...**",
+        scan_mode=options['scan_mode']
     )
     
     if not scan_success:
         return  # Error occurred during scanning
     
-    total_messages = 0
-    total_reactions_given = 0
-    total_reactions_received = 0
-    active_users = set()
-    
-    # Count messages
-    for user_id, channels in analytics_data['messages'].items():
-        if channel_id in channels:
-            total_messages += channels[channel_id]
-            active_users.add(user_id)
-    
-    # Count reactions given
-    for user_id, channels in analytics_data['reactions_given'].items():
-        if channel_id in channels:
-            total_reactions_given += sum(channels[channel_id].values())
-            active_users.add(user_id)
-    
-    # Count reactions received
-    for user_id, channels in analytics_data['reactions_received'].items():
-        if channel_id in channels:
-            total_reactions_received += sum(channels[channel_id].values())
-            active_users.add(user_id)
+    # Served from the cache until this channel's data changes
+    cache_key = ('stats_mini', channel_id, options['start'], options['end'])
+    version = response_cache.version(channel_id)
+    embed = response_cache.get(cache_key, channel_id)
+    if embed is not None:
+        await ctx.send(embed=embed)
+        return
+    
+    # Date ranges are answered from the per-day counters; no Discord history calls
+    date_range = describe_date_range(options)
+    if date_range:
+        totals = storage.range_totals(channel_id, *date_range_days(options))
+    else:
+        totals = storage.channel_totals(channel_id)
+    total_messages = totals['messages']
+    total_reactions_given = totals['reactions_given']
+    total_reactions_received = totals['reactions_received']
+    active_users = totals['active_users']
     
     embed = discord.Embed(
-        title="📈 Channel Statistics\n📅 All-Time Analytics",
+        title=f"📈 Channel Statistics\n📅 {date_range or 'All-Time Analytics'}",
         color=discord.Color.green(),
         timestamp=datetime.utcnow()
     )
@@ -713,7 +3967,7 @@ async def stats_mini(ctx):
     embed.add_field(name="💬 Total Messages", value=f"{total_messages:,}", inline=True)
     embed.add_field(name="👍 Total Reactions Given", value=f"{total_reactions_given:,}", inline=True)
     embed.add_field(name="⭐ Total Reactions Received", value=f"{total_reactions_received:,}", inline=True)
-    embed.add_field(name="👥 Active Users", value=f"{len(active_users):,}", inline=True)
+    embed.add_field(name="👥 Active Users", value=f"{active_users:,}", inline=True)
     
     if total_messages > 0:
         avg_reactions_per_message = total_reactions_received / total_messages
@@ -722,7 +3976,7 @@ async def stats_mini(ctx):
     # Add note about date range analytics
     embed.add_field(
         name="📅 Date Range Analytics",
-        value="**For date-specific analytics**, use the Admin Console script:\n`01-DiscordBot-Users_Stats-RunMe-ForAdminExternalConsole.py`",
+        value="Add `--start=YYYY-MM-DD` and/or `--end=YYYY-MM-DD` (UTC), e.g. `!stats_mini --start=2024-01-01`",
         inline=False
     )
     
@@ -732,8 +3986,9 @@ async def stats_mini(ctx):
     if DEBUG_MODE:
         print(f"🔍 DEBUG: About to send stats_mini embed response")
         print(f"   📊 Total messages: {total_messages}")
-        print(f"   👥 Active users: {len(active_users)}")
+        print(f"   👥 Active users: {active_users}")
     
+    response_cache.put(cache_key, version, embed)
     await ctx.send(embed=embed)
     
     if DEBUG_MODE:
@@ -754,13 +4009,33 @@ async def stats_help(ctx):
         name="📊 Discord Bot Commands",
         value="""
         `!stats_user [@user]` - Show stats for yourself or mentioned user
-        `!stats_mini` - Show channel statistics (all-time)
-        `!stats [percentage]` - Show top users ranking (default: top 50%)
+        `!stats_mini [--start=] [--end=]` - Show channel statistics (all-time or a date range)
+        `!stats [percentage] [--start=] [--end=]` - Show top users ranking (default: top 50%)
         `!stats_help` - Show this help message
         """,
         inline=False
     )
     
+    embed.add_field(
+        name="🛠️ Admin Commands",
+        value="""
+        `!stats_perf [rows]` - Latency percentiles (p50/p95/p99) and counters for event handlers,
+        commands, storage writes and Discord API calls (server administrators only)
+        """,
+        inline=False
+    )
+    
+    embed.add_field(
+        name="⚡ Scan Modes",
+        value="""
+        Add `full` or `count` to any stats command to choose how history is scanned
+        the first time a channel is used (e.g. `!stats 25 count`, `!stats_mini count`):
+        • `full` - Reactions given and received (lists every reactor)
+        • `count` - Reactions received only, much faster on large channels
+        """,
+        inline=False
+    )
+    
     embed.add_field(
         name="🏆 Leaderboard Examples",
         value="""
@@ -775,12 +4050,12 @@ async def stats_help(ctx):
     embed.add_field(
         name="📅 Date Range Analytics",
         value="""
-        **For date-specific analytics**, use the Admin Console script:
+        Add `--start=YYYY-MM-DD` and/or `--end=YYYY-MM-DD` (UTC days) to `!stats` or `!stats_mini`:
+        `!stats --start=2024-01-01`
+        `!stats 25 --start=2024-01-01 --end=2024-12-31`
+        Ranges cover activity the bot has recorded or scanned since per-day tracking was added.
+        For a full rescan of older history, use the Admin Console script:
         `01-DiscordBot-Users_Stats-RunMe-ForAdminExternalConsole.py`
-        
-        Examples:
-        `python script.py --start=2024-01-01`
-        `python script.py --start=2024-01-01 --end=2024-12-31`
         """,
         inline=False
     )
@@ -821,6 +4096,59 @@ async def stats_help(ctx):
     
     await ctx.send(embed=embed)
 
+def format_latency(seconds):
+    """Compact latency for tables: 45µs, 12.3ms, 2.10s"""
+    if seconds < 0.001:
+        return f"{seconds * 1_000_000:.0f}µs"
+    if seconds < 1:
+        return f"{seconds * 1000:.1f}ms"
+    return f"{seconds:.2f}s"
+
+@bot.command(name='stats_perf')
+async def stats_perf(ctx, rows: int = 20):
+    """Show latency percentiles and counters for handlers, commands, storage and Discord API calls
+    
+    Args:
+        rows: Number of operations to list, slowest in total first (default: 20)
+    """
+    permissions = getattr(ctx.author, 'guild_permissions', None)
+    if permissions is None or not permissions.administrator:
+        await ctx.send("❌ !stats_perf is only available to server administrators.")
+        return
+    
+    rows = max(1, min(rows, 40))
+    summary = perf.summary()
+    embed = discord.Embed(title="⏱️ Bot Performance", color=discord.Color.dark_teal())
+    
+    if summary:
+        lines = [f"{'operation':<36} {'calls':>6} {'p50':>7} {'p95':>7} {'p99':>7} {'err':>4}"]
+        for name, count, p50, p95, p99, slowest, errors in summary[:rows]:
+            if len(name) > 36:
+                name = '…' + name[-35:]  # Keep the distinctive end of long API routes
+            lines.append(f"{name:<36} {count:>6} {format_latency(p50):>7} {format_latency(p95):>7} {format_latency(p99):>7} {errors:>4}")
+        embed.description = "```\n" + "\n".join(lines) + "\n```"
+        if len(summary) > rows:
+            embed.description += f"\n{len(summary) - rows} more operation(s) not shown - use `!stats_perf {len(summary)}`"
+    else:
+        embed.description = "No operations timed yet."
+    
+    counters = perf.counter_values()
+    if counters:
+        embed.add_field(name="🔢 Counters", value="\n".join(f"`{name}`: {value:,}" for name, value in counters), inline=False)
+    
+    monitor = loop_monitor.stats()
+    lag = perf.histograms.get('event_loop.lag')
+    loop_text = (f"lag p50 {format_latency(lag.percentile(0.50))} • p99 {format_latency(lag.percentile(0.99))} • "
+                 f"max {format_latency(lag.max)}" if lag else "no samples yet")
+    loop_text += f"\n{perf.counters.get('event_loop.stalls', 0)} stall(s) over {format_latency(monitor['threshold'])}"
+    for when, seconds, where in reversed(monitor['recent_stalls'][-5:]):
+        loop_text += f"\n• {format_latency(seconds)} in `{where}` ({(time.time() - when) / 60:.0f} min ago)"
+    embed.add_field(name="🐢 Event Loop", value=loop_text[:1024], inline=False)
+    
+    uptime_hours = (time.time() - perf.started) / 3600
+    embed.set_footer(text=f"Uptime {uptime_hours:.1f}h • Prometheus file: {perf.path or 'disabled'}")
+    await ctx.send(embed=embed)
+
 # Debug commands (only available when DEBUG_MODE is enabled)
 @bot.command(name='debug_data')
 async def debug_data(ctx):
@@ -830,6 +4158,7 @@ async def debug_data(ctx):
         return
         
     embed = discord.Embed(title="🔍 Debug: Current Data Structure", color=discord.Color.orange())
+    analytics_data = storage.export_data()
     
     # Messages data
     msg_count = len(analytics_data['messages'])
@@ -854,6 +4183,38 @@ async def debug_data(ctx):
         sample_data = dict(analytics_data['reactions_received'][sample_user])
         embed.add_field(name="📝 Sample Reactions Received", value=f"User {sample_user}: {sample_data}", inline=False)
     
+    dedupe = message_dedupe.stats()
+    embed.add_field(
+        name="🧹 Message Dedupe Cache",
+        value=f"{dedupe['size']}/{dedupe['max_size']} IDs • {dedupe['hits']} hits • {dedupe['misses']} misses • "
+              f"{dedupe['evictions']} evicted • {dedupe['expirations']} expired",
+        inline=False
+    )
+    
+    names = display_names.stats()
+    embed.add_field(
+        name="🏷️ Display Name Cache",
+        value=f"{names['size']} names • {names['hits']} hits • {names['misses']} misses • "
+              f"{names['chunks']} guild chunks • {names['queries']} member queries • {names['fetches']} fetched ({names['failures']} failed) • {names['invalidations']} invalidated",
+        inline=False
+    )
+    
+    cache = response_cache.stats()
+    embed.add_field(
+        name="🗃️ Response Cache",
+        value=f"{cache['hit_rate']:.0%} hit rate ({cache['hits']} hits, {cache['misses']} misses, {cache['stale']} stale) • "
+              f"{cache['entries']} entries, {cache['bytes']:,}/{cache['max_bytes']:,} bytes • {cache['evictions']} evicted",
+        inline=False
+    )
+    
+    edits = {name.rsplit('.', 1)[1]: value for name, value in perf.counter_values() if name.startswith('progress.')}
+    embed.add_field(
+        name="✏️ Progress Edits",
+        value=f"{edits.get('sent', 0)} sent • {edits.get('coalesced', 0)} coalesced • {edits.get('failed', 0)} failed "
+              f"({edits.get('rate_limited', 0)} rate-limited) • {edits.get('updates', 0)} updates",
+        inline=False
+    )
+    
     await ctx.send(embed=embed)
     
     # Also print to console
@@ -861,6 +4222,10 @@ async def debug_data(ctx):
     print(f"Messages: {dict(analytics_data['messages'])}")
     print(f"Reactions Given: {dict(analytics_data['reactions_given'])}")
     print(f"Reactions Received: {dict(analytics_data['reactions_received'])}")
+    print(f"Message dedupe cache: {message_dedupe.stats()}")
+    print(f"Display name cache: {display_names.stats()}")
+    print(f"Response cache: {response_cache.stats()}")
+    print(f"Progress edits: {edits}")
 
 @bot.command(name='debug_reactions')
 async def debug_reactions(ctx):
@@ -883,18 +4248,26 @@ async def debug_clear(ctx):
         await ctx.send("❌ Debug commands are only available when DEBUG_MODE is enabled.")
         return
         
-    analytics_data['messages'] = defaultdict(lambda: defaultdict(int))
-    analytics_data['reactions_given'] = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
-    analytics_data['reactions_received'] = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
-    
-    # Save the cleared data
-    save_data(analytics_data)
+    storage.clear()
+    backfill.clear()
+    response_cache.invalidate_all()
     
     await ctx.send("🔍 **Debug**: All analytics data cleared!")
     print(f"\n🔍 DEBUG: Analytics data cleared by {ctx.author.name}")
 
 def main():
     """Main function to run the Discord Analytics Bot"""
+    # Offline memory comparison of the data layouts (no Discord connection needed)
+    if '--benchmark-memory' in sys.argv[1:]:
+        print("🧪 Building synthetic dataset (50,000 users x 200 channels)...", flush=True)
+        results = benchmark_memory_layouts()
+        print(f"   Message counters:  {results['message_counters']:,}")
+        print(f"   Reaction counters: {results['reaction_counters']:,}")
+        print(f"   Nested defaultdicts:  {results['dict_bytes'] / 2**20:8.1f} MiB")
+        print(f"   CompactCounterStore:  {results['compact_bytes'] / 2**20:8.1f} MiB")
+        print(f"   Ratio: {results['dict_bytes'] / results['compact_bytes']:.1f}x smaller", flush=True)
+        return
+    
     print("🚀 DISCORD BOT STARTUP INITIATED", flush=True)
     print("📅 Startup Time: " + datetime.now().strftime('%Y-%m-%d %H:%M:%S'), flush=True)
     print("🐍 Python Version: " + sys.version, flush=True)
@@ -919,6 +4292,69 @@ def main():
     if DEBUG_MODE:
         logging.getLogger().setLevel(logging.DEBUG)
     
+    # Storage backend and write-behind save settings (data is flushed every N seconds or after N unsaved events)
+    global storage
+    storage = create_storage_backend()
+    print(f"💾 Storage backend: {storage.name} (save every {storage.interval:g}s or {storage.max_dirty_events} events)", flush=True)
+    if isinstance(storage, JsonStorageBackend):
+        print(f"🗜️  Journal compaction: every {storage.compact_interval:g}s or {storage.compact_max_events} events", flush=True)
+    
+    # Load data on startup
+    storage.load()
+    
+    # Background history backfills survive restarts
+    global backfill, BACKFILL_WAIT_SECONDS
+    backfill = BackfillManager()
+    backfill.load()
+    BACKFILL_WAIT_SECONDS = float(os.getenv('BACKFILL_WAIT_SECONDS', BACKFILL_WAIT_SECONDS))
+    
+    # Status message edits during long-running commands are coalesced to one per interval
+    global PROGRESS_EDIT_INTERVAL
+    PROGRESS_EDIT_INTERVAL = float(os.getenv('PROGRESS_EDIT_INTERVAL_SECONDS', PROGRESS_EDIT_INTERVAL))
+    
+    # History scan mode used when a command does not pick one
+    global DEFAULT_SCAN_MODE
+    DEFAULT_SCAN_MODE = parse_scan_mode(os.getenv('SCAN_MODE', 'full')) or 'full'
+    
+    # Parallel reaction lookups during history scans
+    global REACTION_FETCH_CONCURRENCY
+    REACTION_FETCH_CONCURRENCY = max(1, int(os.getenv('REACTION_FETCH_CONCURRENCY', REACTION_FETCH_CONCURRENCY)))
+    
+    # Duplicate gateway events are ignored for DEDUPE_TTL_SECONDS (up to DEDUPE_CACHE_SIZE message IDs)
+    global message_dedupe
+    message_dedupe = MessageDedupeCache(
+        max_size=int(os.getenv('DEDUPE_CACHE_SIZE', 10000)),
+        ttl=float(os.getenv('DEDUPE_TTL_SECONDS', 60))
+    )
+    
+    # Leaderboard names are kept for NAME_CACHE_TTL_SECONDS and fetched NAME_LOOKUP_CONCURRENCY at a time
+    global display_names
+    display_names = DisplayNameCache(
+        ttl=float(os.getenv('NAME_CACHE_TTL_SECONDS', 86400)),
+        concurrency=max(1, int(os.getenv('NAME_LOOKUP_CONCURRENCY', 4))),
+        chunk_limit=int(os.getenv('MEMBER_CHUNK_LIMIT', 1000))
+    )
+    display_names.load()
+    storage.flush_hooks.append(display_names.save)
+    
+    # Stats embeds are reused until the channel's data changes (LRU within RESPONSE_CACHE_MAX_BYTES)
+    global response_cache
+    response_cache = ResponseCache(max_bytes=int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 1_000_000)))
+    
+    # Latency and counter metrics for node_exporter's textfile collector ('' disables the file)
+    global METRICS_FILE, METRICS_INTERVAL
+    METRICS_FILE = os.getenv('METRICS_FILE', METRICS_FILE)
+    METRICS_INTERVAL = max(1.0, float(os.getenv('METRICS_INTERVAL_SECONDS', METRICS_INTERVAL)))
+    if METRICS_FILE:
+        print(f"📈 Metrics file: {METRICS_FILE} (every {METRICS_INTERVAL:g}s)", flush=True)
+    
+    # Loop lag is sampled every LOOP_LAG_INTERVAL_SECONDS; blocking longer than SLOW_CALLBACK_SECONDS is logged with a stack
+    global loop_monitor
+    loop_monitor = LoopMonitor(
+        interval=max(0.05, float(os.getenv('LOOP_LAG_INTERVAL_SECONDS', 0.5))),
+        threshold=max(0.01, float(os.getenv('SLOW_CALLBACK_SECONDS', 0.25)))
+    )
+    
     # Get Discord token
     token = os.getenv('DISCORD_BOT_TOKEN')
     
@@ -986,11 +4422,15 @@ def main():
         
         # Print full traceback in debug mode
         if DEBUG_MODE:
-            import traceback
             print("", flush=True)
             print("🔍 DEBUG: Full error traceback:", flush=True)
             traceback.print_exc()
     
+    # Last-chance flush in case the bot stopped without a clean close()
+    if storage.dirty:
+        storage.flush()
+    display_names.save()
+    
     print("🛑 BOT EXECUTION COMPLETED", flush=True)
 
 if __name__ == "__main__":